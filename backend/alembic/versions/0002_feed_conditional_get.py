@@ -0,0 +1,34 @@
+"""feed conditional GET state
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.add_column(sa.Column("etag", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("last_modified", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("content_hash", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.drop_column("content_hash")
+        batch_op.drop_column("last_modified")
+        batch_op.drop_column("etag")
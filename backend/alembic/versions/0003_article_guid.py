@@ -0,0 +1,32 @@
+"""article guid
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.add_column(sa.Column("guid", sa.String(), nullable=True))
+        batch_op.create_unique_constraint("uq_articles_feed_guid", ["feed_id", "guid"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.drop_constraint("uq_articles_feed_guid", type_="unique")
+        batch_op.drop_column("guid")
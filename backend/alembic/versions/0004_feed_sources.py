@@ -0,0 +1,92 @@
+"""shared feed sources
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Gives the unnamed constraints from the baseline schema a name SQLite batch mode can drop
+naming_convention = {
+    "uq": "uq_%(table_name)s_%(column_0_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "feed_sources",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("last_fetched", sa.DateTime(), nullable=True),
+        sa.Column("etag", sa.String(), nullable=True),
+        sa.Column("last_modified", sa.String(), nullable=True),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("url"),
+    )
+    op.create_index("ix_feed_sources_id", "feed_sources", ["id"])
+
+    # One source per distinct URL; validators are dropped so the first poll re-downloads
+    op.execute(
+        "INSERT INTO feed_sources (url, title, last_fetched, created_at) "
+        "SELECT url, MIN(title), MAX(last_fetched), MIN(created_at) FROM feeds GROUP BY url"
+    )
+
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.add_column(sa.Column("source_id", sa.Integer(), nullable=True))
+    op.execute("UPDATE feeds SET source_id = (SELECT id FROM feed_sources WHERE feed_sources.url = feeds.url)")
+
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.add_column(sa.Column("source_id", sa.Integer(), nullable=True))
+    op.execute("UPDATE articles SET source_id = (SELECT source_id FROM feeds WHERE feeds.id = articles.feed_id)")
+
+    # A user subscribed twice to the same URL keeps the oldest subscription
+    op.execute(
+        "DELETE FROM feeds WHERE id NOT IN "
+        "(SELECT MIN(id) FROM feeds GROUP BY user_id, source_id)"
+    )
+
+    is_sqlite = op.get_bind().dialect.name == "sqlite"
+
+    with op.batch_alter_table("feeds", naming_convention=naming_convention) as batch_op:
+        batch_op.alter_column("source_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index("ix_feeds_source_id", ["source_id"])
+        batch_op.create_unique_constraint("uq_feeds_user_source", ["user_id", "source_id"])
+        batch_op.create_foreign_key("fk_feeds_source_id_feed_sources", "feed_sources", ["source_id"], ["id"])
+        batch_op.drop_column("url")
+        batch_op.drop_column("last_fetched")
+        batch_op.drop_column("etag")
+        batch_op.drop_column("last_modified")
+        batch_op.drop_column("content_hash")
+
+    with op.batch_alter_table("articles", naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint("uq_articles_feed_guid", type_="unique")
+        batch_op.drop_constraint("uq_articles_link" if is_sqlite else "articles_link_key", type_="unique")
+        batch_op.drop_constraint(
+            "fk_articles_feed_id_feeds" if is_sqlite else "articles_feed_id_fkey", type_="foreignkey"
+        )
+        batch_op.drop_column("feed_id")
+        batch_op.alter_column("source_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_unique_constraint("uq_articles_source_link", ["source_id", "link"])
+        batch_op.create_unique_constraint("uq_articles_source_guid", ["source_id", "guid"])
+        batch_op.create_foreign_key("fk_articles_source_id_feed_sources", "feed_sources", ["source_id"], ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    raise NotImplementedError("Splitting feeds into shared sources cannot be reverted automatically")
@@ -0,0 +1,34 @@
+"""adaptive per-source polling
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.add_column(sa.Column("fetch_interval_minutes", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("next_fetch_at", sa.DateTime(), nullable=True))
+        batch_op.create_index("ix_feed_sources_next_fetch_at", ["next_fetch_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.drop_index("ix_feed_sources_next_fetch_at")
+        batch_op.drop_column("next_fetch_at")
+        batch_op.drop_column("fetch_interval_minutes")
@@ -0,0 +1,36 @@
+"""article timeline indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination needs a total order, so published_at can no longer be NULL
+    op.execute("UPDATE articles SET published_at = COALESCE(fetched_at, CURRENT_TIMESTAMP) WHERE published_at IS NULL")
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.alter_column("published_at", existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index("ix_articles_source_published", ["source_id", "published_at", "id"])
+        batch_op.create_index("ix_articles_published", ["published_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.drop_index("ix_articles_published")
+        batch_op.drop_index("ix_articles_source_published")
+        batch_op.alter_column("published_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,68 @@
+"""article full-text search index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.text import html_to_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE articles ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX ix_articles_search_vector ON articles USING GIN (search_vector)")
+        return
+
+    if bind.dialect.name != "sqlite":
+        return
+    try:
+        op.execute("CREATE VIRTUAL TABLE articles_fts USING fts5(title, body, tokenize='porter unicode61')")
+    except sa.exc.OperationalError as e:
+        # SQLite built without FTS5: search falls back to LIKE
+        print(f"Full-text search disabled: {e}")
+        return
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, title, content FROM articles WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("INSERT INTO articles_fts (rowid, title, body) VALUES (:rowid, :title, :body)"),
+            [{"rowid": r.id, "title": r.title or "", "body": html_to_text(r.content or "")} for r in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_articles_search_vector")
+        op.execute("ALTER TABLE articles DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS articles_fts")
@@ -0,0 +1,42 @@
+"""unread and starred counters per subscription
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.add_column(sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("starred_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute(
+        "UPDATE feeds SET "
+        "unread_count = (SELECT COUNT(a.id) FROM articles a "
+        "LEFT OUTER JOIN user_articles ua ON ua.article_id = a.id AND ua.user_id = feeds.user_id "
+        "WHERE a.source_id = feeds.source_id AND COALESCE(ua.is_read, false) = false), "
+        "starred_count = (SELECT COUNT(a.id) FROM articles a "
+        "JOIN user_articles ua ON ua.article_id = a.id AND ua.user_id = feeds.user_id "
+        "WHERE a.source_id = feeds.source_id AND ua.is_starred = true)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.drop_column("starred_count")
+        batch_op.drop_column("unread_count")
@@ -0,0 +1,32 @@
+"""fetch leases on feed sources
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.add_column(sa.Column("lease_owner", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.drop_column("lease_expires_at")
+        batch_op.drop_column("lease_owner")
@@ -0,0 +1,32 @@
+"""per-user data versions for conditional responses
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("feeds_version", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("articles_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("articles_version")
+        batch_op.drop_column("feeds_version")
@@ -0,0 +1,85 @@
+"""article excerpt, reading time, lead image and compressed content
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.services.content import pack_content, unpack_content
+from app.services.text import absolute_image_url, html_text_and_image, make_excerpt, reading_time_minutes
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, Sequence[str], None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _batches(bind, columns: str, where: str = "1 = 1"):
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(f"SELECT id, {columns} FROM articles WHERE id > :last AND {where} ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.add_column(sa.Column("content_zlib", sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column("excerpt", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("reading_time", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("lead_image", sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    compress = (
+        settings.ARTICLE_CONTENT_COMPRESSION
+        and bind.dialect.name == "sqlite"
+        and sa.inspect(bind).has_table("articles_fts")
+    )
+    update = sa.text(
+        "UPDATE articles SET content = :content, content_zlib = :content_zlib, excerpt = :excerpt, "
+        "reading_time = :reading_time, lead_image = :lead_image WHERE id = :id"
+    )
+    for rows in _batches(bind, "link, content"):
+        params = []
+        for row in rows:
+            text, image = html_text_and_image(row.content or "")
+            content, content_zlib = pack_content(row.content, compress)
+            params.append({
+                "id": row.id,
+                "content": content,
+                "content_zlib": content_zlib,
+                "excerpt": make_excerpt(text),
+                "reading_time": reading_time_minutes(text),
+                "lead_image": absolute_image_url(image, row.link),
+            })
+        bind.execute(update, params)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    update = sa.text("UPDATE articles SET content = :content WHERE id = :id")
+    for rows in _batches(bind, "content, content_zlib", "content_zlib IS NOT NULL"):
+        bind.execute(update, [{"id": r.id, "content": unpack_content(r.content, r.content_zlib)} for r in rows])
+
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.drop_column("lead_image")
+        batch_op.drop_column("reading_time")
+        batch_op.drop_column("excerpt")
+        batch_op.drop_column("content_zlib")
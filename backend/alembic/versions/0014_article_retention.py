@@ -0,0 +1,36 @@
+"""article retention settings per subscription
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, Sequence[str], None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.add_column(sa.Column("keep_days", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("keep_max_articles", sa.Integer(), nullable=True))
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.add_column(sa.Column("pruned_before", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.drop_column("pruned_before")
+    with op.batch_alter_table("feeds") as batch_op:
+        batch_op.drop_column("keep_max_articles")
+        batch_op.drop_column("keep_days")
@@ -0,0 +1,34 @@
+"""fetch health per feed source
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0016"
+down_revision: Union[str, Sequence[str], None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.add_column(sa.Column("last_error_at", sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column("consecutive_failures", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("last_status_code", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("feed_sources") as batch_op:
+        batch_op.drop_column("last_status_code")
+        batch_op.drop_column("consecutive_failures")
+        batch_op.drop_column("last_error_at")
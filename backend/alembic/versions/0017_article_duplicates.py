@@ -0,0 +1,54 @@
+"""article fingerprints and duplicate links
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0017"
+down_revision: Union[str, Sequence[str], None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing articles get no fingerprints; only articles fetched from now on are matched
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.add_column(sa.Column("url_hash", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("guid_hash", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("simhash", sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column("duplicate_of_id", sa.Integer(), nullable=True))
+    op.create_index("ix_articles_url_hash", "articles", ["url_hash"])
+    op.create_index("ix_articles_guid_hash", "articles", ["guid_hash"])
+    op.create_index("ix_articles_duplicate_of_id", "articles", ["duplicate_of_id"])
+    op.create_table(
+        "article_simhash_bands",
+        sa.Column("band", sa.SmallInteger(), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["article_id"], ["articles.id"]),
+        sa.PrimaryKeyConstraint("band", "value", "article_id"),
+    )
+    op.create_index("ix_article_simhash_bands_article_id", "article_simhash_bands", ["article_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_article_simhash_bands_article_id", table_name="article_simhash_bands")
+    op.drop_table("article_simhash_bands")
+    op.drop_index("ix_articles_duplicate_of_id", table_name="articles")
+    op.drop_index("ix_articles_guid_hash", table_name="articles")
+    op.drop_index("ix_articles_url_hash", table_name="articles")
+    with op.batch_alter_table("articles") as batch_op:
+        batch_op.drop_column("duplicate_of_id")
+        batch_op.drop_column("simhash")
+        batch_op.drop_column("guid_hash")
+        batch_op.drop_column("url_hash")
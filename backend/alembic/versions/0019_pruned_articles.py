@@ -0,0 +1,35 @@
+"""links of pruned articles
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0019"
+down_revision: Union[str, Sequence[str], None] = "0018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "pruned_articles",
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("link", sa.String(), nullable=False),
+        sa.Column("guid", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["source_id"], ["feed_sources.id"]),
+        sa.PrimaryKeyConstraint("source_id", "link"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("pruned_articles")
@@ -0,0 +1,30 @@
+"""per-user version of unread/starred counts
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0020"
+down_revision: Union[str, Sequence[str], None] = "0019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("counts_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("counts_version")
@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import Request, Response, status
+
+# Lists must be revalidated every time, which is cheap when nothing changed
+LIST_CACHE_CONTROL = "private, no-cache"
+# Article content does not change; read/starred state in a cached copy may lag for a minute
+DETAIL_CACHE_CONTROL = "private, max-age=60"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison (RFC 9110): W/ prefixes are ignored
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    version: str,
+    cache_control: str = LIST_CACHE_CONTROL,
+) -> Optional[Response]:
+    """Tag the response with a weak ETag for `version`; returns a 304 to send instead
+    when the client already has it, before the endpoint runs its queries"""
+    etag = f'W/"{version}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
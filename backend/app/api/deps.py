@@ -1,23 +1,26 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from ..core.database import AsyncSessionLocal, get_db, get_async_db
 from ..core.security import decode_access_token
+from ..core.user_cache import CurrentUser, cache_user, cached_user
 from ..models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
 
+def token_claims(token: str) -> Tuple[Optional[int], str, int]:
+    """(user id, username, token version) from a token; tokens issued before ids were added have no id"""
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -25,9 +28,60 @@ def get_current_user(
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
+    return payload.get("uid"), username, payload.get("ver", 0)
+
+
+def user_lookup(user_id: Optional[int], username: str):
+    if user_id is not None:
+        return select(User).where(User.id == user_id)
+    return select(User).where(User.username == username)
+
+
+def check_user(user: Optional[User], token_version: int) -> CurrentUser:
+    if user is None or user.token_version != token_version:
+        raise credentials_exception
+    return cache_user(user)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    user_id, username, token_version = token_claims(token)
+    if user_id is not None:
+        current = cached_user(user_id, token_version)
+        if current is not None:
+            return current
+
+    return check_user(db.scalar(user_lookup(user_id, username)), token_version)
+
 
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """get_current_user for async endpoints, sharing the request's AsyncSession"""
+    user_id, username, token_version = token_claims(token)
+    if user_id is not None:
+        current = cached_user(user_id, token_version)
+        if current is not None:
+            return current
+
+    return check_user(await db.scalar(user_lookup(user_id, username)), token_version)
+
+
+def stream_token(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None, description="Token for clients that cannot send headers (EventSource)")
+) -> str:
+    token = token or access_token
+    if not token:
         raise credentials_exception
+    return token
+
 
-    return user
+async def get_stream_user(token: str = Depends(stream_token)) -> CurrentUser:
+    """get_current_user_async for long-lived streams, which accept the token as ?access_token= too.
+    The session is closed right away instead of being held for the whole stream."""
+    async with AsyncSessionLocal() as db:
+        return await get_current_user_async(token, db)
@@ -1,187 +1,296 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session, Query as ORMQuery, defer
+from sqlalchemy import DateTime, and_, case, desc, false, func, literal, or_, select, tuple_
 from typing import List, Optional
 from datetime import datetime
-from ...core.database import get_db
+from ...core.database import get_db, dialect_insert
+from ...core.user_cache import CurrentUser
+from ...core.write_queue import run_write
 from ...api.deps import get_current_user
-from ...models.user import User
+from ...api.conditional import DETAIL_CACHE_CONTROL, conditional_response
+from ...api.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 from ...models.article import Article, UserArticle
 from ...models.feed import Feed
-from ...schemas.article import Article as ArticleSchema, ArticleMarkRead, ArticleMarkStarred
+from ...services.content import unpack_content
+from ...services.counters import apply_deltas
+from ...services.dedup import duplicate_of_visible, original_content
+from ...services.events import counts_event, publish
+from ...services.search import apply_search
+from ...services.versions import bump_versions, user_versions
+from ...schemas.article import (
+    Article as ArticleSchema, ArticleListItem, ArticleMarkRead, ArticleMarkStarred, ArticleBulkMark,
+    ArticleBulkMarkResult
+)
 
 router = APIRouter()
 
+# A missing user_articles row means unread and not starred
+is_read_expr = func.coalesce(UserArticle.is_read, false())
+is_starred_expr = func.coalesce(UserArticle.is_starred, false())
 
-@router.get("/", response_model=List[ArticleSchema])
+
+def user_articles_query(db: Session, user_id: int, with_content: bool = False) -> ORMQuery:
+    """Articles visible to a user together with their subscription id and read/starred state"""
+    query = db.query(
+        Article,
+        Feed.id,
+        is_read_expr,
+        is_starred_expr,
+    ).join(
+        Feed, and_(Feed.source_id == Article.source_id, Feed.user_id == user_id)
+    ).outerjoin(
+        UserArticle, and_(UserArticle.article_id == Article.id, UserArticle.user_id == user_id)
+    )
+    if not with_content:
+        query = query.options(defer(Article.content), defer(Article.content_zlib))
+    return query
+
+
+def article_from_row(row, with_content: bool = False) -> ArticleListItem:
+    article, subscription_id, is_read, is_starred = row
+    fields = dict(
+        id=article.id,
+        feed_id=subscription_id,
+        title=article.title,
+        link=article.link,
+        author=article.author,
+        published_at=article.published_at,
+        fetched_at=article.fetched_at,
+        excerpt=article.excerpt,
+        reading_time=article.reading_time,
+        lead_image=article.lead_image,
+        duplicate_of_id=article.duplicate_of_id,
+        is_read=bool(is_read),
+        is_starred=bool(is_starred),
+    )
+    if with_content:
+        return ArticleSchema(content=unpack_content(article.content, article.content_zlib), **fields)
+    return ArticleListItem(**fields)
+
+
+def articles_etag(db: Session, user_id: int, view: str = "articles") -> str:
+    return f"{view}-{user_id}.{user_versions(db, user_id).articles_version}"
+
+
+def get_user_article_row(db: Session, user_id: int, article_id: int, with_content: bool = False):
+    row = user_articles_query(db, user_id, with_content).filter(Article.id == article_id).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Article not found"
+        )
+    return row
+
+
+@router.get("/", response_model=List[ArticleListItem])
 def get_articles(
+    request: Request,
+    response: Response,
     feed_id: Optional[int] = None,
     is_read: Optional[bool] = None,
     is_starred: Optional[bool] = None,
     search: Optional[str] = None,
+    collapse_duplicates: bool = False,
+    cursor: Optional[str] = None,
     skip: int = 0,
     limit: int = 50,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Article).join(Feed).filter(Feed.user_id == current_user.id)
+    # The query string is part of the cache key, so one version covers every filter and page
+    not_modified = conditional_response(request, response, articles_etag(db, current_user.id))
+    if not_modified:
+        return not_modified
 
-    if feed_id:
-        query = query.filter(Article.feed_id == feed_id)
-
-    if search:
-        query = query.filter(
-            or_(
-                Article.title.contains(search),
-                Article.content.contains(search)
-            )
-        )
-
-    articles = query.order_by(desc(Article.published_at)).offset(skip).limit(limit).all()
+    query = user_articles_query(db, current_user.id)
 
-    result = []
-    for article in articles:
-        user_article = db.query(UserArticle).filter(
-            UserArticle.user_id == current_user.id,
-            UserArticle.article_id == article.id
-        ).first()
+    if feed_id:
+        query = query.filter(Feed.id == feed_id)
+    elif collapse_duplicates:
+        # Within one feed every article is shown; across feeds a story appears once
+        query = query.filter(~duplicate_of_visible(current_user.id))
 
-        article_dict = {
-            "id": article.id,
-            "feed_id": article.feed_id,
-            "title": article.title,
-            "link": article.link,
-            "content": article.content,
-            "author": article.author,
-            "published_at": article.published_at,
-            "fetched_at": article.fetched_at,
-            "is_read": user_article.is_read if user_article else False,
-            "is_starred": user_article.is_starred if user_article else False
-        }
+    # Evaluated in SQL before pagination so filtered pages come back full
+    if is_read is not None:
+        query = query.filter(is_read_expr == is_read)
+    if is_starred is not None:
+        query = query.filter(is_starred_expr == is_starred)
 
-        if is_read is not None and article_dict["is_read"] != is_read:
-            continue
-        if is_starred is not None and article_dict["is_starred"] != is_starred:
-            continue
+    if search:
+        # Relevance-ranked results page with skip; cursors follow the timeline order only
+        query, search_order, rank, snippet = apply_search(query, db, search)
+        if rank is not None:
+            query = query.add_columns(rank, snippet)
+        rows = query.order_by(search_order, desc(Article.id)).offset(skip).limit(limit).all()
+        articles = []
+        for row in rows:
+            article = article_from_row(row[:4])
+            if rank is not None:
+                article.search_rank, article.snippet = row[4], row[5]
+            articles.append(article)
+        return articles
 
-        result.append(ArticleSchema(**article_dict))
+    # Keyset pagination: continue strictly after the last (published_at, id) seen.
+    # skip/offset paging is kept for older clients.
+    query = query.order_by(desc(Article.published_at), desc(Article.id))
+    if cursor:
+        published_at, article_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Article.published_at, Article.id) < tuple_(published_at, article_id))
+    else:
+        query = query.offset(skip)
 
-    return result
+    rows = query.limit(limit).all()
+    if rows and len(rows) == limit:
+        last = rows[-1][0]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.published_at, last.id)
+    return [article_from_row(row) for row in rows]
 
 
 @router.get("/{article_id}", response_model=ArticleSchema)
 def get_article(
     article_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    article = db.query(Article).join(Feed).filter(
-        Article.id == article_id,
-        Feed.user_id == current_user.id
-    ).first()
-
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
-
-    user_article = db.query(UserArticle).filter(
-        UserArticle.user_id == current_user.id,
-        UserArticle.article_id == article.id
-    ).first()
+    not_modified = conditional_response(
+        request, response, articles_etag(db, current_user.id, f"article{article_id}"), DETAIL_CACHE_CONTROL
+    )
+    if not_modified:
+        return not_modified
+    row = get_user_article_row(db, current_user.id, article_id, with_content=True)
+    article = article_from_row(row, with_content=True)
+    if article.content is None and article.duplicate_of_id:
+        article.content = original_content(db, article.duplicate_of_id)
+    return article
 
-    article_dict = {
-        "id": article.id,
-        "feed_id": article.feed_id,
-        "title": article.title,
-        "link": article.link,
-        "content": article.content,
-        "author": article.author,
-        "published_at": article.published_at,
-        "fetched_at": article.fetched_at,
-        "is_read": user_article.is_read if user_article else False,
-        "is_starred": user_article.is_starred if user_article else False
-    }
 
-    return ArticleSchema(**article_dict)
+def upsert_user_article(db: Session, user_id: int, article_id: int, **state):
+    stmt = dialect_insert(db, UserArticle.__table__).values(
+        user_id=user_id, article_id=article_id, **state
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserArticle.user_id, UserArticle.article_id],
+        set_=state
+    ))
 
 
-@router.post("/{article_id}/read", response_model=ArticleSchema)
+@router.post("/{article_id}/read", response_model=ArticleListItem)
 def mark_article_read(
     article_id: int,
     mark_data: ArticleMarkRead,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    article = db.query(Article).join(Feed).filter(
-        Article.id == article_id,
-        Feed.user_id == current_user.id
-    ).first()
-
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
-        )
-
-    user_article = db.query(UserArticle).filter(
-        UserArticle.user_id == current_user.id,
-        UserArticle.article_id == article_id
-    ).first()
-
-    if not user_article:
-        user_article = UserArticle(
-            user_id=current_user.id,
-            article_id=article_id,
+    def write(session: Session) -> ArticleListItem:
+        article = article_from_row(get_user_article_row(session, current_user.id, article_id))
+        upsert_user_article(
+            session, current_user.id, article_id,
             is_read=mark_data.is_read,
             read_at=datetime.utcnow() if mark_data.is_read else None
         )
-        db.add(user_article)
-    else:
-        user_article.is_read = mark_data.is_read
-        user_article.read_at = datetime.utcnow() if mark_data.is_read else None
+        if article.is_read != mark_data.is_read:
+            apply_deltas(session, {article.feed_id: (-1 if mark_data.is_read else 1, 0)})
+            session.execute(bump_versions(current_user.id, counts=True, articles=True))
+            publish(session, [counts_event(current_user.id, [article.feed_id])])
+        article.is_read = mark_data.is_read
+        return article
 
-    db.commit()
-    db.refresh(user_article)
+    return run_write(db, write)
 
-    return get_article(article_id, current_user, db)
 
-
-@router.post("/{article_id}/star", response_model=ArticleSchema)
+@router.post("/{article_id}/star", response_model=ArticleListItem)
 def mark_article_starred(
     article_id: int,
     mark_data: ArticleMarkStarred,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    article = db.query(Article).join(Feed).filter(
-        Article.id == article_id,
-        Feed.user_id == current_user.id
-    ).first()
+    def write(session: Session) -> ArticleListItem:
+        article = article_from_row(get_user_article_row(session, current_user.id, article_id))
+        upsert_user_article(session, current_user.id, article_id, is_starred=mark_data.is_starred)
+        if article.is_starred != mark_data.is_starred:
+            apply_deltas(session, {article.feed_id: (0, 1 if mark_data.is_starred else -1)})
+            session.execute(bump_versions(current_user.id, counts=True, articles=True))
+            publish(session, [counts_event(current_user.id, [article.feed_id])])
+        article.is_starred = mark_data.is_starred
+        return article
+
+    return run_write(db, write)
+
 
-    if not article:
+@router.post("/mark", response_model=ArticleBulkMarkResult)
+def bulk_mark_articles(
+    mark_data: ArticleBulkMark,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if mark_data.is_read is None and mark_data.is_starred is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Article not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nothing to update: set is_read and/or is_starred"
         )
 
-    user_article = db.query(UserArticle).filter(
-        UserArticle.user_id == current_user.id,
-        UserArticle.article_id == article_id
-    ).first()
-
-    if not user_article:
-        user_article = UserArticle(
-            user_id=current_user.id,
-            article_id=article_id,
-            is_starred=mark_data.is_starred
+    selectors = []
+    if mark_data.article_ids is not None:
+        selectors.append(Article.id.in_(mark_data.article_ids))
+    if mark_data.feed_id is not None:
+        selectors.append(Feed.id == mark_data.feed_id)
+    if mark_data.category is not None:
+        selectors.append(Feed.category == mark_data.category)
+    if mark_data.older_than is not None:
+        selectors.append(Article.published_at < mark_data.older_than)
+    if not selectors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Select articles by article_ids, feed_id, category and/or older_than"
         )
-        db.add(user_article)
-    else:
-        user_article.is_starred = mark_data.is_starred
 
-    db.commit()
-    db.refresh(user_article)
+    state = {}
+    read_changed = literal(False)
+    starred_changed = literal(False)
+    if mark_data.is_read is not None:
+        state["is_read"] = literal(mark_data.is_read)
+        state["read_at"] = literal(datetime.utcnow() if mark_data.is_read else None, DateTime)
+        read_changed = is_read_expr != mark_data.is_read
+    if mark_data.is_starred is not None:
+        state["is_starred"] = literal(mark_data.is_starred)
+        starred_changed = is_starred_expr != mark_data.is_starred
+
+    def matching(*columns):
+        # Only rows whose state actually changes are selected, so counts are exact
+        return select(*columns).select_from(Article).join(
+            Feed, and_(Feed.source_id == Article.source_id, Feed.user_id == current_user.id)
+        ).outerjoin(
+            UserArticle, and_(UserArticle.article_id == Article.id, UserArticle.user_id == current_user.id)
+        ).where(*selectors, or_(read_changed, starred_changed))
+
+    def write(session: Session) -> int:
+        per_feed = session.execute(matching(
+            Feed.id,
+            func.sum(case((read_changed, 1), else_=0)),
+            func.sum(case((starred_changed, 1), else_=0)),
+        ).group_by(Feed.id)).all()
+        unread_sign = -1 if mark_data.is_read else 1
+        starred_sign = 1 if mark_data.is_starred else -1
+        apply_deltas(session, {
+            feed_id: (unread_sign * (read or 0), starred_sign * (starred or 0))
+            for feed_id, read, starred in per_feed
+        })
+
+        articles = matching(literal(current_user.id), Article.id, *state.values())
+        stmt = dialect_insert(session, UserArticle.__table__).from_select(
+            ["user_id", "article_id", *state], articles
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserArticle.user_id, UserArticle.article_id],
+            set_={name: stmt.excluded[name] for name in state}
+        )
+        updated = session.execute(stmt).rowcount
+        if updated:
+            session.execute(bump_versions(current_user.id, counts=True, articles=True))
+            publish(session, [counts_event(current_user.id, [feed_id for feed_id, _, _ in per_feed])])
+        return updated
 
-    return get_article(article_id, current_user, db)
+    return ArticleBulkMarkResult(updated=run_write(db, write))
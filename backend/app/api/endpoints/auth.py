@@ -5,8 +5,10 @@ from datetime import timedelta
 from ...core.database import get_db
 from ...core.security import verify_password, get_password_hash, create_access_token
 from ...core.config import settings
+from ...core.user_cache import CurrentUser, invalidate_user
+from ...api.deps import get_current_user
 from ...models.user import User
-from ...schemas.user import UserCreate, User as UserSchema, Token
+from ...schemas.user import UserCreate, User as UserSchema, Token, PasswordChange
 
 router = APIRouter()
 
@@ -52,8 +54,35 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    return issue_token(user)
+
+
+def issue_token(user: User) -> dict:
+    # uid/ver let get_current_user authenticate from its cache without loading the user
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id, "ver": user.token_version},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.put("/password", response_model=Token)
+def change_password(
+    password_data: PasswordChange,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    user = db.get(User, current_user.id)
+    if not verify_password(password_data.current_password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect password"
+        )
+
+    # Revokes every token issued so far, including the one used for this request
+    user.hashed_password = get_password_hash(password_data.new_password)
+    user.token_version += 1
+    db.commit()
+    invalidate_user(user.id)
+    return issue_token(user)
@@ -0,0 +1,83 @@
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from ...api.deps import get_stream_user, stream_token
+from ...core.config import settings
+from ...core.security import decode_access_token
+from ...core.user_cache import CurrentUser
+from ...services.events import Event, backend, broadcaster
+
+router = APIRouter()
+
+# How long EventSource clients wait before reconnecting
+RETRY_MS = 5000
+
+
+def format_event(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(request: Request, token: str, user_id: int, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    # Subscribe before replaying, so nothing published in between is lost; duplicates are skipped by id
+    subscription = broadcaster.subscribe(user_id)
+    closing = asyncio.ensure_future(broadcaster.closing.wait())
+    getter = None
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        sent = 0
+        if last_event_id is not None:
+            sent = last_event_id
+            replayed = await backend.replay(user_id, last_event_id)
+            if replayed is None:
+                yield "event: reset\ndata: {}\n\n"
+            else:
+                for event in replayed:
+                    yield format_event(event)
+                    sent = event.id
+        while True:
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, closing}, timeout=settings.EVENTS_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if closing in done:
+                # Shutting down: the client reconnects to whichever server is up next
+                return
+            if getter not in done:
+                getter.cancel()
+                # Idle streams cost a timer and a token check, no queries
+                if await request.is_disconnected() or decode_access_token(token) is None:
+                    return
+                yield ": ping\n\n"
+                continue
+            event = getter.result()
+            if event.id <= sent and event.type != "reset":
+                continue
+            sent = max(sent, event.id)
+            yield format_event(event)
+    finally:
+        closing.cancel()
+        if getter is not None:
+            getter.cancel()
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: CurrentUser = Depends(get_stream_user),
+    token: str = Depends(stream_token),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    last_event_id: Optional[int] = Query(None),
+):
+    """Server-Sent Events: "articles" when a feed gets new articles, "feeds" when a feed's fetch
+    status changes, "counts" when read/starred counts change, and "reset" when events were
+    missed and the client should reload"""
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    return StreamingResponse(
+        event_stream(request, token, current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
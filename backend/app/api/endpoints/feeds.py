@@ -1,53 +1,249 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from ...core.database import get_db
-from ...api.deps import get_current_user
-from ...models.user import User
-from ...models.feed import Feed
-from ...schemas.feed import Feed as FeedSchema, FeedCreate, FeedUpdate
-from ...services.rss_fetcher import fetch_and_store_articles
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
+from ...core.database import async_write_lock, get_db, get_async_db
+from ...core.user_cache import CurrentUser
+from ...api.deps import get_current_user, get_current_user_async
+from ...api.conditional import conditional_response
+from ...models.feed import Feed, FeedSource
+from ...models.article import Article, PrunedArticle, UserArticle
+from ...schemas.feed import (
+    Feed as FeedSchema, FeedCreate, FeedUpdate, FeedCount, CategoryCount, FeedCounts, FeedRetention,
+    FeedFetchProgress, FeedImportResult
+)
+from ...services.rss_fetcher import fetch_and_store_articles, fetch_in_background
+from ...services.counters import reconcile_counters
+from ...services.dedup import forget_articles
+from ...services.opml import MAX_OPML_BYTES, build_opml, import_subscriptions, parse_opml
+from ...services.retention import count_prunable, source_policies
+from ...services.search import unindex_articles
+from ...services.versions import bump_versions, user_versions
 
 router = APIRouter()
 
 
+def feeds_etag(db: Session, user_id: int, view: str = "feeds") -> str:
+    versions = user_versions(db, user_id)
+    version = versions.counts_version if view == "counts" else versions.feeds_version
+    return f"{view}-{user_id}.{version}"
+
+
 @router.get("/", response_model=List[FeedSchema])
 def get_feeds(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    feeds = db.query(Feed).filter(Feed.user_id == current_user.id).all()
+    not_modified = conditional_response(request, response, feeds_etag(db, current_user.id))
+    if not_modified:
+        return not_modified
+    feeds = db.query(Feed).options(joinedload(Feed.source)).filter(
+        Feed.user_id == current_user.id
+    ).all()
     return feeds
 
 
+@router.get("/counts", response_model=FeedCounts)
+def get_feed_counts(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    not_modified = conditional_response(request, response, feeds_etag(db, current_user.id, "counts"))
+    if not_modified:
+        return not_modified
+    rows = db.query(Feed.id, Feed.category, Feed.unread_count, Feed.starred_count).filter(
+        Feed.user_id == current_user.id
+    ).all()
+
+    categories = {}
+    for _, category, unread, starred in rows:
+        totals = categories.setdefault(category, [0, 0])
+        totals[0] += unread
+        totals[1] += starred
+
+    return FeedCounts(
+        feeds=[
+            FeedCount(feed_id=feed_id, unread=unread, starred=starred)
+            for feed_id, _, unread, starred in rows
+        ],
+        categories=[
+            CategoryCount(category=category, unread=unread, starred=starred)
+            for category, (unread, starred) in categories.items()
+        ],
+        unread=sum(row.unread_count for row in rows),
+        starred=sum(row.starred_count for row in rows),
+    )
+
+
+@router.get("/retention", response_model=List[FeedRetention])
+def get_feed_retention(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Effective retention of each feed and how many articles the next pruning run would delete"""
+    feeds = db.query(Feed.id, Feed.source_id).filter(Feed.user_id == current_user.id).all()
+    policies = source_policies(db, {source_id for _, source_id in feeds})
+    return [
+        FeedRetention(
+            feed_id=feed_id,
+            keep_days=policies[source_id].keep_days,
+            keep_max_articles=policies[source_id].keep_max_articles,
+            prunable=count_prunable(db, source_id, policies[source_id]),
+        )
+        for feed_id, source_id in feeds
+    ]
+
+
 @router.post("/", response_model=FeedSchema, status_code=status.HTTP_201_CREATED)
 async def create_feed(
     feed_data: FeedCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    feed = Feed(
-        user_id=current_user.id,
-        title=feed_data.title,
-        url=feed_data.url,
-        description=feed_data.description,
-        category=feed_data.category
+    already_subscribed = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Already subscribed to this feed"
     )
-    db.add(feed)
-    db.commit()
-    db.refresh(feed)
+    async with async_write_lock(db):
+        source = await db.scalar(select(FeedSource).where(FeedSource.url == feed_data.url))
+        if not source:
+            db.add(FeedSource(url=feed_data.url))
+            try:
+                await db.flush()
+            except IntegrityError:
+                # Another request created the source since the lookup; subscribe to that one
+                await db.rollback()
+            source = await db.scalar(select(FeedSource).where(FeedSource.url == feed_data.url))
+        if await db.scalar(select(Feed.id).where(
+            Feed.user_id == current_user.id,
+            Feed.source_id == source.id
+        )):
+            raise already_subscribed
+
+        feed = Feed(
+            user_id=current_user.id,
+            source=source,
+            title=feed_data.title,
+            description=feed_data.description,
+            category=feed_data.category
+        )
+        db.add(feed)
+        await db.execute(bump_versions(current_user.id, counts=True, articles=True))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # The same subscription was created concurrently
+            await db.rollback()
+            raise already_subscribed
 
-    await fetch_and_store_articles(feed, db)
+    # Sources other users already subscribe to have their articles in place. New ones are
+    # fetched in the background: the feed reports fetch_status "pending" until that is done.
+    if source.last_fetched is None:
+        fetch_in_background([source.id])
+    else:
+        async with async_write_lock(db):
+            await db.run_sync(reconcile_counters, [feed.id])
+        # Counters were updated in SQL; nothing else on the feed changed
+        await db.refresh(feed, ["unread_count", "starred_count"])
 
     return feed
 
 
+@router.get("/fetch-status", response_model=FeedFetchProgress)
+def get_fetch_status(
+    request: Request,
+    response: Response,
+    ids: Optional[List[int]] = Query(None, description="Only these feeds, e.g. the feed_ids of an import"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """How many of the user's feeds are still waiting for their first fetch, and how many failed"""
+    not_modified = conditional_response(request, response, feeds_etag(db, current_user.id, "fetch-status"))
+    if not_modified:
+        return not_modified
+    pending = and_(FeedSource.last_error.is_(None), FeedSource.last_fetched.is_(None))
+    query = db.query(
+        func.count(Feed.id),
+        func.sum(case((pending, 1), else_=0)),
+        func.sum(case((FeedSource.last_error.is_not(None), 1), else_=0)),
+    ).join(Feed.source).filter(Feed.user_id == current_user.id)
+    if ids:
+        query = query.filter(Feed.id.in_(ids))
+    total, pending_count, error_count = query.one()
+    pending_count, error_count = pending_count or 0, error_count or 0
+    return FeedFetchProgress(
+        total=total, pending=pending_count, error=error_count, ok=total - pending_count - error_count
+    )
+
+
+@router.post("/import", response_model=FeedImportResult)
+async def import_feeds(
+    file: UploadFile = File(..., description="OPML file"),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Subscribe to every feed in an OPML file in one transaction. Returns right away: feeds nobody
+    fetched before are fetched concurrently in the background; follow them with /fetch-status."""
+    data = await file.read(MAX_OPML_BYTES + 1)
+    if len(data) > MAX_OPML_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"OPML files are limited to {MAX_OPML_BYTES} bytes"
+        )
+    try:
+        feeds, invalid = parse_opml(data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def write(session: Session):
+        result = import_subscriptions(session, current_user.id, feeds)
+        session.commit()
+        return result
+
+    async with async_write_lock(db):
+        result = await db.run_sync(write)
+    fetch_in_background(result.pending_source_ids)
+    return FeedImportResult(
+        created=len(result.feed_ids),
+        already_subscribed=result.already_subscribed,
+        invalid=invalid,
+        feed_ids=result.feed_ids,
+    )
+
+
+@router.get("/export")
+def export_feeds(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The user's subscriptions as an OPML file, grouped by category"""
+    feeds = db.query(Feed).options(joinedload(Feed.source)).filter(
+        Feed.user_id == current_user.id
+    ).all()
+    return Response(
+        build_opml(feeds, f"{current_user.username}'s subscriptions"),
+        media_type="text/x-opml",
+        headers={"Content-Disposition": 'attachment; filename="subscriptions.opml"'},
+    )
+
+
 @router.get("/{feed_id}", response_model=FeedSchema)
 def get_feed(
     feed_id: int,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    not_modified = conditional_response(request, response, feeds_etag(db, current_user.id, f"feed{feed_id}"))
+    if not_modified:
+        return not_modified
     feed = db.query(Feed).filter(
         Feed.id == feed_id,
         Feed.user_id == current_user.id
@@ -64,7 +260,7 @@ def get_feed(
 def update_feed(
     feed_id: int,
     feed_data: FeedUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     feed = db.query(Feed).filter(
@@ -83,7 +279,12 @@ def update_feed(
         feed.description = feed_data.description
     if feed_data.category is not None:
         feed.category = feed_data.category
+    for field in ("keep_days", "keep_max_articles"):
+        if field in feed_data.model_fields_set:
+            setattr(feed, field, getattr(feed_data, field))
 
+    # The category groups the counts
+    db.execute(bump_versions(current_user.id, counts=True))
     db.commit()
     db.refresh(feed)
     return feed
@@ -92,7 +293,7 @@ def update_feed(
 @router.delete("/{feed_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_feed(
     feed_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     feed = db.query(Feed).filter(
@@ -105,7 +306,27 @@ def delete_feed(
             detail="Feed not found"
         )
 
+    source_id = feed.source_id
+    source_articles = db.query(Article.id).filter(Article.source_id == source_id)
+    db.query(UserArticle).filter(
+        UserArticle.user_id == current_user.id,
+        UserArticle.article_id.in_(source_articles)
+    ).delete(synchronize_session=False)
     db.delete(feed)
+    db.flush()
+
+    # Drop the shared source once its last subscriber is gone
+    if not db.query(Feed).filter(Feed.source_id == source_id).first():
+        db.query(UserArticle).filter(
+            UserArticle.article_id.in_(source_articles)
+        ).delete(synchronize_session=False)
+        forget_articles(db, source_articles)
+        unindex_articles(db, source_articles)
+        db.query(Article).filter(Article.source_id == source_id).delete(synchronize_session=False)
+        db.query(PrunedArticle).filter(PrunedArticle.source_id == source_id).delete(synchronize_session=False)
+        db.query(FeedSource).filter(FeedSource.id == source_id).delete(synchronize_session=False)
+
+    db.execute(bump_versions(current_user.id, counts=True, articles=True))
     db.commit()
     return None
 
@@ -113,18 +334,20 @@ def delete_feed(
 @router.post("/{feed_id}/refresh", response_model=dict)
 async def refresh_feed(
     feed_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    feed = db.query(Feed).filter(
+    feed = await db.scalar(select(Feed).options(joinedload(Feed.source)).where(
         Feed.id == feed_id,
         Feed.user_id == current_user.id
-    ).first()
+    ))
     if not feed:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Feed not found"
         )
 
-    count = await fetch_and_store_articles(feed, db)
+    count = await fetch_and_store_articles(feed.source, db)
+    if count is None:
+        return {"message": "Feed is already being fetched"}
     return {"message": f"Fetched {count} new articles"}
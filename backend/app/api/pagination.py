@@ -0,0 +1,25 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(published_at: datetime, article_id: int) -> str:
+    """Opaque keyset cursor pointing just past (published_at, id)"""
+    raw = json.dumps({"p": published_at.isoformat(), "i": article_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["p"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -4,10 +4,50 @@ from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./rss_reader.db"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_MB: int = 64
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_POOL_SIZE: int = 10
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
     RSS_FETCH_INTERVAL_MINUTES: int = 30
+    RSS_FETCH_MIN_INTERVAL_MINUTES: int = 5
+    RSS_FETCH_MAX_INTERVAL_MINUTES: int = 1440
+    RSS_FETCH_TIMEOUT_SECONDS: float = 30.0
+    RSS_FETCH_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    RSS_FETCH_BACKOFF_MAX_MINUTES: int = 2880
+    RSS_FETCH_BACKOFF_JITTER: float = 0.2
+    RSS_HOST_FAILURE_THRESHOLD: int = 5
+    RSS_HOST_OPEN_SECONDS: float = 600.0
+    RSS_FETCH_CONCURRENCY: int = 20
+    RSS_FETCH_PER_HOST_CONCURRENCY: int = 2
+    RSS_FETCH_HTTP2: bool = True
+    RSS_FETCH_MAX_BYTES: int = 10 * 1024 * 1024
+    RSS_PARSER_WORKERS: int = 2
+    RSS_SCHEDULER_ENABLED: bool = True
+    RSS_FETCH_BATCH_SIZE: int = 50
+    RSS_FETCH_LEASE_SECONDS: int = 600
+    COUNTERS_RECONCILE_INTERVAL_MINUTES: int = 60
+    ARTICLE_CONTENT_COMPRESSION: bool = True
+    DEDUP_ENABLED: bool = True
+    DEDUP_WINDOW_DAYS: int = 14
+    RETENTION_DAYS: int = 0
+    RETENTION_MAX_ARTICLES_PER_FEED: int = 0
+    RETENTION_INTERVAL_MINUTES: int = 60
+    RETENTION_BATCH_SIZE: int = 500
+    METRICS_ENABLED: bool = True
+    METRICS_PORT: int = 0
+    SLOW_QUERY_MS: int = 200
+    SLOW_FETCH_SECONDS: float = 10.0
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_BUFFER_SIZE: int = 200
+    EVENTS_POLL_SECONDS: float = 1.0
+    EVENTS_RETENTION_MINUTES: int = 60
 
     class Config:
         env_file = ".env"
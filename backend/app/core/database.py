@@ -1,15 +1,70 @@
-from sqlalchemy import create_engine
+import asyncio
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import instrument_engine
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL keeps reads from waiting on writers; synchronous=NORMAL is durable in WAL mode
+    except for the last commits on power loss"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA page_count")
+    if cursor.fetchone()[0] == 0:
+        # New database: let retention hand freed pages back (existing files need a VACUUM for this)
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_MB * 1024}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.close()
+
+
+if is_sqlite:
+    # Connections are kept open: each holds its page cache and memory map.
+    # Writes from the API go through core/write_queue.py, so a small pool is enough.
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.SQLITE_POOL_SIZE,
+        max_overflow=settings.SQLITE_POOL_SIZE,
+    )
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+else:
+    engine = create_engine(settings.DATABASE_URL)
+
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the same database, used by async endpoints and the feed fetcher
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0], scheme)
+    return f"{driver}://{rest}"
+
+
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL))
+if is_sqlite:
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+instrument_engine(async_engine.sync_engine)
+
+# Objects stay usable after commit; lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -19,3 +74,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# SQLite allows a single writer. Async sessions interleave on the event loop, so their
+# write transactions queue here instead of failing with "database is locked".
+_sqlite_write_lock = asyncio.Lock()
+
+
+@asynccontextmanager
+async def async_write_lock(db: AsyncSession):
+    if db.get_bind().dialect.name == "sqlite":
+        async with _sqlite_write_lock:
+            yield
+    else:
+        yield
+
+
+def dialect_insert(db, table):
+    """Return an INSERT construct supporting ON CONFLICT for the session's dialect"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
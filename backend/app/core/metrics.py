@@ -0,0 +1,129 @@
+"""Prometheus metrics for feed fetching, the API and database queries.
+
+With several server processes set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by
+them, so /metrics reports all of them instead of whichever one answers the scrape.
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+FETCH_STAGE_SECONDS = Histogram(
+    "rss_fetch_stage_seconds", "Time spent per feed in each fetch stage", ["stage"], buckets=STAGE_BUCKETS
+)
+FETCH_BYTES = Histogram(
+    "rss_fetch_bytes", "Response body size per feed download",
+    buckets=tuple(1024 * 4 ** i for i in range(9)),
+)
+FETCH_NEW_ARTICLES = Histogram(
+    "rss_fetch_new_articles", "New articles stored per feed fetch", buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250)
+)
+FETCH_RESULTS = Counter("rss_fetch_results", "Feed fetches by outcome", ["status"])
+FETCH_ERRORS = Counter("rss_fetch_errors", "Failed feed fetches by error class", ["kind"])
+FETCH_CYCLE_SECONDS = Histogram(
+    "rss_fetch_cycle_seconds", "Wall time of a fetch cycle", buckets=STAGE_BUCKETS + (120.0, 300.0, 600.0)
+)
+DUPLICATE_ARTICLES = Counter(
+    "rss_duplicate_articles", "New articles stored as duplicates of another source's article"
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "rss_scheduler_lag_seconds", "How long after becoming due a feed was claimed for fetching",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency", ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per API request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per API request", ["route"], buckets=QUERY_BUCKETS
+)
+QUERY_SECONDS = Histogram("db_query_seconds", "SQL statement execution time", buckets=QUERY_BUCKETS)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Set by the request middleware; copied into threadpool calls, greenlets and write-queue jobs
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("request_queries", default=None)
+
+
+def start_request() -> QueryStats:
+    stats = QueryStats()
+    _request_queries.set(stats)
+    return stats
+
+
+def route_template(scope) -> str:
+    """The matched route with its parameters as placeholders, e.g. /api/articles/{article_id}"""
+    if scope.get("route") is None:
+        # Unmatched paths share one label so scanners cannot blow up the series count
+        return "unmatched"
+    # Newer FastAPI versions include routers without copying their routes, which then only
+    # know the path below the router's prefix
+    included = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(included, "path", None) or scope["route"].path
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, queries: QueryStats):
+    REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+    REQUEST_QUERIES.labels(route).observe(queries.count)
+    REQUEST_QUERY_SECONDS.labels(route).observe(queries.seconds)
+
+
+def observe_fetch(status: str, error_kind: Optional[str], bytes_downloaded: int, new_articles: int):
+    FETCH_RESULTS.labels(status).inc()
+    # Fetches skipped for a failing host are counted as "skipped", not as errors
+    if status == "error":
+        FETCH_ERRORS.labels(error_kind or "other").inc()
+    if bytes_downloaded:
+        FETCH_BYTES.observe(bytes_downloaded)
+    if status == "ok":
+        FETCH_NEW_ARTICLES.observe(new_articles)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    QUERY_SECONDS.observe(elapsed)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        print(f"Slow query ({elapsed * 1000:.0f} ms): {' '.join(statement.split())[:500]}")
+
+
+def instrument_engine(engine: Engine):
+    """Time every statement run on a (sync) engine; pass async_engine.sync_engine for async ones"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def render_metrics() -> bytes:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,21 @@
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from .database import engine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+BASELINE_REVISION = "0001"
+
+
+def run_migrations():
+    """Bring the database schema up to the latest Alembic revision"""
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        # Databases created with Base.metadata.create_all before migrations existed
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
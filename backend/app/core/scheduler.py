@@ -1,21 +1,121 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
 from .config import settings
-from ..services.rss_fetcher import fetch_all_feeds
+from .database import AsyncSessionLocal, SessionLocal, dialect_insert
+from .write_queue import run_write
+from ..models.job import JobLease
+from ..services.counters import reconcile_all_counters
+from ..services.retention import prune_old_articles
+from ..services.rss_fetcher import WORKER_ID, fetch_due_feeds, next_due_time
 
 scheduler = AsyncIOScheduler()
 
+FETCH_JOB_ID = 'fetch_rss_feeds'
+RECONCILE_JOB_ID = 'reconcile_counters'
+RETENTION_JOB_ID = 'prune_articles'
+
+# Other processes (API workers, fetch workers) change the due-queue too, so never sleep longer than this
+MAX_IDLE = timedelta(minutes=1)
+
+
+async def run_due_fetches():
+    try:
+        await fetch_due_feeds()
+    finally:
+        # The fetch job runs once per trigger: if it is not scheduled again here, fetching stops
+        wake_up = datetime.utcnow() + MAX_IDLE
+        try:
+            async with AsyncSessionLocal() as db:
+                due = await next_due_time(db)
+        except Exception as e:
+            print(f"Error finding the next due feed, checking again in {MAX_IDLE}: {str(e)}")
+            due = None
+        schedule_fetch_at(min(due, wake_up) if due else wake_up)
+
+
+def schedule_fetch_at(when: Optional[datetime]):
+    """Make sure the due-queue wakes up no later than `when` (naive UTC)"""
+    if when is None or not scheduler.running:
+        return
+    run_date = when.replace(tzinfo=timezone.utc)
+    job = scheduler.get_job(FETCH_JOB_ID)
+    if job and job.next_run_time and job.next_run_time <= run_date:
+        return
+    scheduler.add_job(
+        run_due_fetches,
+        trigger=DateTrigger(run_date=run_date),
+        id=FETCH_JOB_ID,
+        name='Fetch due RSS feeds',
+        misfire_grace_time=None,
+        coalesce=True,
+        replace_existing=True
+    )
+
+
+def claim_job_lease(name: str, period: timedelta) -> bool:
+    """Take the job's lease for `period` unless another process holds it. The holder keeps
+    renewing it on every run; if it stops, another process takes over once the lease expires."""
+    def claim(db: Session) -> bool:
+        now = datetime.utcnow()
+        db.execute(dialect_insert(db, JobLease.__table__).values(name=name, expires_at=now).on_conflict_do_nothing())
+        return db.execute(
+            update(JobLease).where(
+                JobLease.name == name, or_(JobLease.owner == WORKER_ID, JobLease.expires_at <= now)
+            ).values(owner=WORKER_ID, expires_at=now + period)
+        ).rowcount == 1
+
+    db = SessionLocal()
+    try:
+        return run_write(db, claim)
+    finally:
+        db.close()
+
+
+def add_maintenance_job(job: Callable[[], None], job_id: str, name: str, interval_minutes: int):
+    """Run a whole-database job every `interval_minutes` in only one of the processes scheduling it"""
+    period = timedelta(minutes=interval_minutes)
+
+    def run_if_leased():
+        if claim_job_lease(job_id, period):
+            job()
 
-def start_scheduler():
     scheduler.add_job(
-        fetch_all_feeds,
-        trigger=IntervalTrigger(minutes=settings.RSS_FETCH_INTERVAL_MINUTES),
-        id='fetch_rss_feeds',
-        name='Fetch all RSS feeds',
+        run_if_leased,
+        trigger=IntervalTrigger(minutes=interval_minutes),
+        id=job_id,
+        name=name,
+        max_instances=1,
+        coalesce=True,
         replace_existing=True
     )
+
+
+def start_scheduler(fetch: bool = True, maintenance: bool = True):
+    """Start fetching due feeds and/or the maintenance jobs (counter reconciliation, retention)"""
+    if maintenance:
+        add_maintenance_job(
+            reconcile_all_counters, RECONCILE_JOB_ID, 'Reconcile unread/starred counters',
+            settings.COUNTERS_RECONCILE_INTERVAL_MINUTES,
+        )
+        add_maintenance_job(
+            prune_old_articles, RETENTION_JOB_ID, 'Prune articles past their retention',
+            settings.RETENTION_INTERVAL_MINUTES,
+        )
     scheduler.start()
-    print(f"Scheduler started. RSS feeds will be fetched every {settings.RSS_FETCH_INTERVAL_MINUTES} minutes.")
+    if fetch:
+        schedule_fetch_at(datetime.utcnow())
+        print(
+            "Scheduler started. RSS feeds will be fetched every "
+            f"{settings.RSS_FETCH_MIN_INTERVAL_MINUTES}-{settings.RSS_FETCH_MAX_INTERVAL_MINUTES} minutes "
+            "depending on how often they publish."
+        )
+    else:
+        print("Scheduler started for maintenance jobs; feeds are fetched by fetch workers.")
 
 
 def stop_scheduler():
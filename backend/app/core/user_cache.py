@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+from .config import settings
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user as endpoints see it; enough to scope queries without a DB row"""
+    id: int
+    username: str
+    token_version: int
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def cached_user(user_id: int, token_version: int) -> Optional[CurrentUser]:
+    user = user_cache.get(user_id)
+    if user is not None and user.token_version == token_version:
+        return user
+    return None
+
+
+def cache_user(user) -> CurrentUser:
+    current = CurrentUser(id=user.id, username=user.username, token_version=user.token_version)
+    user_cache.set(current.id, current)
+    return current
+
+
+def invalidate_user(user_id: int):
+    """Drop a user from this process's cache; other processes catch up within the TTL"""
+    user_cache.pop(user_id)
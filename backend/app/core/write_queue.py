@@ -0,0 +1,104 @@
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple, TypeVar
+from sqlalchemy.orm import Session
+from .database import SessionLocal, is_sqlite
+
+T = TypeVar("T")
+
+# Small writes queued while a commit is in progress are committed together
+MAX_BATCH = 100
+
+
+class WriteQueue:
+    """Runs write jobs on one thread, committing whatever has queued up in one transaction.
+    SQLite has a single write lock, so API writes wait in this queue instead of on the lock."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, max_batch: int = MAX_BATCH):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: Callable[[Session], T]) -> "Future[T]":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+        future: Future = Future()
+        # Jobs run in the submitter's context, so their queries count towards its request
+        context = contextvars.copy_context()
+        self._queue.put((lambda db: context.run(job, db), future))
+        return future
+
+    def run(self, job: Callable[[Session], T]) -> T:
+        """Submit a job and wait until it is committed"""
+        return self.submit(job).result()
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch: List[Tuple[Callable, Future]]):
+        db = self.session_factory()
+        try:
+            if len(batch) > 1:
+                try:
+                    results = [job(db) for job, _ in batch]
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                else:
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+                    return
+            # A failing job must not take the rest of the batch with it
+            for job, future in batch:
+                try:
+                    result = job(db)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            db.close()
+
+
+write_queue = WriteQueue()
+
+
+def run_write(db: Session, job: Callable[[Session], T]) -> T:
+    """Run and commit a write job: through the write queue on SQLite, on the request's session otherwise"""
+    if is_sqlite:
+        return write_queue.run(job)
+    result = job(db)
+    db.commit()
+    return result
@@ -1,17 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+import signal
+import threading
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST
 from contextlib import asynccontextmanager
-from .core.database import engine, Base
+from .core.config import settings
+from .core.metrics import observe_request, render_metrics, route_template, start_request
+from .core.migrations import run_migrations
 from .core.scheduler import start_scheduler, stop_scheduler
-from .api.endpoints import auth, feeds, articles
+from .core.write_queue import write_queue
+from .services.events import backend as events_backend, broadcaster
+from .services.feed_parser import shutdown_parser_pool
+from .services.rss_fetcher import close_http_client, stop_background_fetches
+from .api.endpoints import auth, feeds, articles, events
+
+
+def close_streams_on_exit():
+    """uvicorn lets open responses finish before it runs the lifespan shutdown, which event
+    streams never do; end them as soon as the server is told to exit"""
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(broadcaster.close)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    start_scheduler()
+    run_migrations()
+    await events_backend.start()
+    close_streams_on_exit()
+    # With RSS_SCHEDULER_ENABLED=false feeds are fetched by fetch_worker.py instead.
+    # Maintenance jobs always run here; a lease lets one API process run each at a time.
+    start_scheduler(fetch=settings.RSS_SCHEDULER_ENABLED)
     yield
     stop_scheduler()
+    await events_backend.stop()
+    await stop_background_fetches()
+    await close_http_client()
+    shutdown_parser_pool()
+    write_queue.stop()
 
 
 app = FastAPI(
@@ -30,9 +68,26 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    queries = start_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        observe_request(
+            request.method, route_template(request.scope), status, time.perf_counter() - started, queries
+        )
+
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(feeds.router, prefix="/api/feeds", tags=["feeds"])
 app.include_router(articles.router, prefix="/api/articles", tags=["articles"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
 
 
 @app.get("/")
@@ -43,3 +98,9 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
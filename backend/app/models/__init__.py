@@ -1,5 +1,10 @@
 from .user import User
-from .feed import Feed
-from .article import Article, UserArticle
+from .feed import Feed, FeedSource
+from .article import Article, ArticleSimhashBand, PrunedArticle, UserArticle
+from .event import UserEvent
+from .job import JobLease
 
-__all__ = ["User", "Feed", "Article", "UserArticle"]
+__all__ = [
+    "User", "Feed", "FeedSource", "Article", "ArticleSimhashBand", "PrunedArticle", "UserArticle", "UserEvent",
+    "JobLease",
+]
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import (
+    Column, Integer, BigInteger, SmallInteger, String, DateTime, ForeignKey, Text, Boolean, LargeBinary,
+    UniqueConstraint, Index
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
@@ -6,20 +9,61 @@ from ..core.database import Base
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        UniqueConstraint("source_id", "link", name="uq_articles_source_link"),
+        UniqueConstraint("source_id", "guid", name="uq_articles_source_guid"),
+        # Timeline order, used by keyset pagination on (published_at, id)
+        Index("ix_articles_source_published", "source_id", "published_at", "id"),
+        Index("ix_articles_published", "published_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    feed_id = Column(Integer, ForeignKey("feeds.id"), nullable=False)
+    source_id = Column(Integer, ForeignKey("feed_sources.id"), nullable=False)
+    guid = Column(String)
     title = Column(String, nullable=False)
-    link = Column(String, nullable=False, unique=True)
+    link = Column(String, nullable=False)
     content = Column(Text)
+    # zlib-compressed content, with `content` left NULL; see services/content.py
+    content_zlib = Column(LargeBinary)
+    # Computed at ingest for the article list
+    excerpt = Column(String)
+    reading_time = Column(Integer)
+    lead_image = Column(String)
     author = Column(String)
-    published_at = Column(DateTime)
+    published_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     fetched_at = Column(DateTime, default=datetime.utcnow)
+    # Identity across sources, see services/fingerprint.py and services/dedup.py
+    url_hash = Column(BigInteger, index=True)
+    guid_hash = Column(BigInteger, index=True)
+    simhash = Column(BigInteger)
+    # The earlier article from another source that this one repeats; the content is only stored there.
+    # No foreign key: adding one would rebuild the whole articles table on SQLite.
+    duplicate_of_id = Column(Integer, index=True)
 
-    feed = relationship("Feed", back_populates="articles")
+    source = relationship("FeedSource", back_populates="articles")
     user_articles = relationship("UserArticle", back_populates="article", cascade="all, delete-orphan")
 
 
+class ArticleSimhashBand(Base):
+    """One band of an article's SimHash; articles sharing a band are near-duplicate candidates.
+    Only articles that are not duplicates themselves are indexed."""
+    __tablename__ = "article_simhash_bands"
+
+    band = Column(SmallInteger, primary_key=True)
+    value = Column(Integer, primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), primary_key=True, index=True)
+
+
+class PrunedArticle(Base):
+    """An article retention deleted while its entry may still be in the feed, so it is not stored again.
+    Kept until the entry leaves the feed."""
+    __tablename__ = "pruned_articles"
+
+    source_id = Column(Integer, ForeignKey("feed_sources.id"), primary_key=True)
+    link = Column(String, primary_key=True)
+    guid = Column(String)
+
+
 class UserArticle(Base):
     __tablename__ = "user_articles"
 
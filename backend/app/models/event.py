@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from datetime import datetime
+from ..core.database import Base
+
+
+class UserEvent(Base):
+    """Change notification for a user's event stream; only written with EVENTS_BACKEND=database"""
+    __tablename__ = "user_events"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    type = Column(String(32), nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
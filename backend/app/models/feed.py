@@ -1,20 +1,99 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
 
 
+class FeedSource(Base):
+    """A feed URL shared by every user subscribed to it; owns fetch state and articles"""
+    __tablename__ = "feed_sources"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False, unique=True)
+    title = Column(String)
+    last_fetched = Column(DateTime)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String(64))
+    fetch_interval_minutes = Column(Integer)
+    next_fetch_at = Column(DateTime, index=True)
+    last_error = Column(String)
+    last_error_at = Column(DateTime)
+    # Failed fetches since the last successful one; drives the retry backoff
+    consecutive_failures = Column(Integer, nullable=False, default=0, server_default="0")
+    # HTTP status of the latest response, if the request got one
+    last_status_code = Column(Integer)
+    # Set while a fetcher has claimed the source; an expired lease can be claimed again
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    # Newest publication date pruned by retention; older entries are not fetched again
+    pruned_before = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    subscriptions = relationship("Feed", back_populates="source")
+    articles = relationship("Article", back_populates="source", cascade="all, delete-orphan")
+
+    @property
+    def fetch_status(self) -> str:
+        """"pending" until the first fetch, then "ok" or "error" depending on the latest one"""
+        if self.last_error:
+            return "error"
+        if self.last_fetched is None:
+            return "pending"
+        return "ok"
+
+
 class Feed(Base):
+    """A user's subscription to a FeedSource"""
     __tablename__ = "feeds"
+    __table_args__ = (
+        UniqueConstraint("user_id", "source_id", name="uq_feeds_user_source"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    source_id = Column(Integer, ForeignKey("feed_sources.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
-    url = Column(String, nullable=False)
     description = Column(Text)
     category = Column(String)
-    last_fetched = Column(DateTime)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    starred_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Retention for this subscription: NULL follows the global setting, 0 keeps everything
+    keep_days = Column(Integer)
+    keep_max_articles = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="feeds")
-    articles = relationship("Article", back_populates="feed", cascade="all, delete-orphan")
+    source = relationship("FeedSource", back_populates="subscriptions")
+
+    @property
+    def url(self) -> str:
+        return self.source.url
+
+    @property
+    def last_fetched(self):
+        return self.source.last_fetched
+
+    @property
+    def last_error(self):
+        return self.source.last_error
+
+    @property
+    def fetch_status(self) -> str:
+        return self.source.fetch_status
+
+    @property
+    def last_error_at(self):
+        return self.source.last_error_at
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self.source.consecutive_failures or 0
+
+    @property
+    def last_status_code(self):
+        return self.source.last_status_code
+
+    @property
+    def next_fetch_at(self):
+        return self.source.next_fetch_at
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from ..core.database import Base
+
+
+class JobLease(Base):
+    """Which process runs a maintenance job until expires_at, so it runs in one place at a time"""
+    __tablename__ = "job_leases"
+
+    name = Column(String(64), primary_key=True)
+    owner = Column(String)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
+from ..core.user_cache import invalidate_user
 
 
 class User(Base):
@@ -11,7 +12,20 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Bumped to revoke every token issued before (e.g. on password change)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped whenever the user's feed list or article lists change; see services/versions.py
+    feeds_version = Column(Integer, nullable=False, default=0, server_default="0")
+    articles_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped when unread/starred counts change; not by polls that only move fetch timestamps
+    counts_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     feeds = relationship("Feed", back_populates="user", cascade="all, delete-orphan")
     user_articles = relationship("UserArticle", back_populates="user", cascade="all, delete-orphan")
+    events = relationship("UserEvent", cascade="all, delete-orphan")
+
+
+@event.listens_for(User, "after_delete")
+def _forget_deleted_user(mapper, connection, target):
+    invalidate_user(target.id)
@@ -1,9 +1,13 @@
-from .user import User, UserCreate, UserLogin, Token, TokenData
-from .feed import Feed, FeedCreate, FeedUpdate
-from .article import Article, ArticleMarkRead, ArticleMarkStarred
+from .user import User, UserCreate, UserLogin, PasswordChange, Token, TokenData
+from .feed import (
+    Feed, FeedCreate, FeedUpdate, FeedCount, CategoryCount, FeedCounts, FeedRetention,
+    FeedFetchProgress, FeedImportResult
+)
+from .article import Article, ArticleListItem, ArticleMarkRead, ArticleMarkStarred, ArticleBulkMark, ArticleBulkMarkResult
 
 __all__ = [
-    "User", "UserCreate", "UserLogin", "Token", "TokenData",
-    "Feed", "FeedCreate", "FeedUpdate",
-    "Article", "ArticleMarkRead", "ArticleMarkStarred"
+    "User", "UserCreate", "UserLogin", "PasswordChange", "Token", "TokenData",
+    "Feed", "FeedCreate", "FeedUpdate", "FeedCount", "CategoryCount", "FeedCounts", "FeedRetention",
+    "FeedFetchProgress", "FeedImportResult",
+    "Article", "ArticleListItem", "ArticleMarkRead", "ArticleMarkStarred", "ArticleBulkMark", "ArticleBulkMarkResult"
 ]
@@ -1,30 +1,54 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class ArticleBase(BaseModel):
     title: str
     link: str
-    content: Optional[str] = None
     author: Optional[str] = None
     published_at: Optional[datetime] = None
 
 
-class Article(ArticleBase):
+class ArticleListItem(ArticleBase):
+    """An article as shown in lists: a plain-text excerpt instead of the content"""
     id: int
     feed_id: int
     fetched_at: datetime
+    excerpt: Optional[str] = None
+    reading_time: Optional[int] = None
+    lead_image: Optional[str] = None
+    # Set when the same story was stored earlier from another feed
+    duplicate_of_id: Optional[int] = None
     is_read: bool = False
     is_starred: bool = False
+    snippet: Optional[str] = None
+    search_rank: Optional[float] = None
 
     class Config:
         from_attributes = True
 
 
+class Article(ArticleListItem):
+    content: Optional[str] = None
+
+
 class ArticleMarkRead(BaseModel):
     is_read: bool
 
 
 class ArticleMarkStarred(BaseModel):
     is_starred: bool
+
+
+class ArticleBulkMark(BaseModel):
+    article_ids: Optional[List[int]] = None
+    feed_id: Optional[int] = None
+    category: Optional[str] = None
+    older_than: Optional[datetime] = None
+    is_read: Optional[bool] = None
+    is_starred: Optional[bool] = None
+
+
+class ArticleBulkMarkResult(BaseModel):
+    updated: int
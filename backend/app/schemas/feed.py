@@ -1,6 +1,6 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class FeedBase(BaseModel):
@@ -18,13 +18,70 @@ class FeedUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
+    # Sending null resets these to the global retention settings
+    keep_days: Optional[int] = Field(None, ge=0)
+    keep_max_articles: Optional[int] = Field(None, ge=0)
 
 
 class Feed(FeedBase):
     id: int
     user_id: int
+    source_id: int
+    unread_count: int = 0
+    starred_count: int = 0
+    keep_days: Optional[int] = None
+    keep_max_articles: Optional[int] = None
     last_fetched: Optional[datetime] = None
+    last_error: Optional[str] = None
+    # "pending" until the first fetch, then "ok" or "error"
+    fetch_status: str = "pending"
+    # Fetch health; last_fetched is the last successful fetch
+    last_error_at: Optional[datetime] = None
+    consecutive_failures: int = 0
+    last_status_code: Optional[int] = None
+    next_fetch_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class FeedCount(BaseModel):
+    feed_id: int
+    unread: int
+    starred: int
+
+
+class CategoryCount(BaseModel):
+    category: Optional[str] = None
+    unread: int
+    starred: int
+
+
+class FeedRetention(BaseModel):
+    feed_id: int
+    # Effective limits for the feed's articles; None keeps everything
+    keep_days: Optional[int] = None
+    keep_max_articles: Optional[int] = None
+    prunable: int
+
+
+class FeedCounts(BaseModel):
+    feeds: List[FeedCount]
+    categories: List[CategoryCount]
+    unread: int
+    starred: int
+
+
+class FeedFetchProgress(BaseModel):
+    total: int
+    pending: int
+    ok: int
+    error: int
+
+
+class FeedImportResult(BaseModel):
+    created: int
+    already_subscribed: int
+    invalid: int
+    feed_ids: List[int]
@@ -17,6 +17,11 @@ class UserLogin(BaseModel):
     password: str
 
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+
 class User(UserBase):
     id: int
     created_at: datetime
@@ -0,0 +1,27 @@
+"""Article content storage: large bodies can be kept zlib-compressed.
+
+Only SQLite databases with a full-text index compress, since the index keeps its own
+plain-text copy for search. PostgreSQL compresses large values (TOAST) by itself and
+its generated search column reads the content directly.
+"""
+import zlib
+from typing import Optional, Tuple
+
+# Smaller bodies barely shrink
+COMPRESS_MIN_BYTES = 512
+
+
+def pack_content(content: Optional[str], compress: bool) -> Tuple[Optional[str], Optional[bytes]]:
+    """Values for (Article.content, Article.content_zlib)"""
+    if not compress or not content or len(content) < COMPRESS_MIN_BYTES:
+        return content, None
+    packed = zlib.compress(content.encode("utf-8"), 6)
+    if len(packed) >= len(content):
+        return content, None
+    return None, packed
+
+
+def unpack_content(content: Optional[str], packed: Optional[bytes]) -> Optional[str]:
+    if packed is not None:
+        return zlib.decompress(packed).decode("utf-8")
+    return content
@@ -0,0 +1,86 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import and_, false, func, select, true, update
+from sqlalchemy.orm import Session
+from ..core.database import SessionLocal
+from ..models.article import Article, UserArticle
+from ..models.feed import Feed
+from .versions import bump_versions
+
+
+def add_new_articles(db: Session, source_id: int, count: int):
+    """New articles start out unread for every subscriber of the source"""
+    if count:
+        db.execute(
+            update(Feed).where(Feed.source_id == source_id).values(
+                unread_count=Feed.unread_count + count
+            )
+        )
+
+
+def apply_deltas(db: Session, deltas: Dict[int, tuple]):
+    """Apply {feed_id: (unread_delta, starred_delta)} to the user's subscription counters"""
+    for feed_id, (unread_delta, starred_delta) in deltas.items():
+        if not unread_delta and not starred_delta:
+            continue
+        db.execute(
+            update(Feed).where(Feed.id == feed_id).values(
+                unread_count=Feed.unread_count + unread_delta,
+                starred_count=Feed.starred_count + starred_delta,
+            )
+        )
+
+
+def _unread_subquery():
+    return select(func.count(Article.id)).select_from(Article).outerjoin(
+        UserArticle, and_(UserArticle.article_id == Article.id, UserArticle.user_id == Feed.user_id)
+    ).where(
+        Article.source_id == Feed.source_id,
+        func.coalesce(UserArticle.is_read, false()) == false()
+    ).scalar_subquery()
+
+
+def _starred_subquery():
+    return select(func.count(Article.id)).select_from(Article).join(
+        UserArticle, and_(UserArticle.article_id == Article.id, UserArticle.user_id == Feed.user_id)
+    ).where(
+        Article.source_id == Feed.source_id,
+        UserArticle.is_starred == true()
+    ).scalar_subquery()
+
+
+def initialize_counters(db: Session, feed_ids: Iterable[int]):
+    """Count the articles new subscriptions start with; does not commit"""
+    db.execute(
+        update(Feed).where(Feed.id.in_(list(feed_ids))).values(
+            unread_count=_unread_subquery(), starred_count=_starred_subquery()
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_counters(db: Session, feed_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute counters from articles x user_articles; returns the number of feeds fixed"""
+    unread = _unread_subquery()
+    starred = _starred_subquery()
+    stmt = update(Feed).where(
+        (Feed.unread_count != unread) | (Feed.starred_count != starred)
+    ).values(unread_count=unread, starred_count=starred)
+    users = None
+    if feed_ids is not None:
+        feed_ids = list(feed_ids)
+        stmt = stmt.where(Feed.id.in_(feed_ids))
+        users = select(Feed.user_id).where(Feed.id.in_(feed_ids))
+    fixed = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    if fixed:
+        db.execute(bump_versions(users, counts=True))
+    db.commit()
+    return fixed
+
+
+def reconcile_all_counters():
+    db = SessionLocal()
+    try:
+        fixed = reconcile_counters(db)
+        if fixed:
+            print(f"Reconciled unread/starred counters for {fixed} feeds")
+    finally:
+        db.close()
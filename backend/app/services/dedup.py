@@ -0,0 +1,180 @@
+"""Duplicate articles: the same story arriving through several feed sources.
+
+A new article repeats an earlier one from another source when their canonical links or
+global GUIDs match, or when their SimHash fingerprints are at most SIMHASH_MAX_DISTANCE bits
+apart (looked up through the band index). Only articles published within DEDUP_WINDOW_DAYS
+are compared. A duplicate is still stored for its own source's subscribers, with duplicate_of_id
+pointing at the original. Where search reads the SQLite index's copy of the text, a duplicate
+whose link or GUID matched and whose text is the original's (whitespace aside) is stored without
+content and reads the original's. Anything else keeps its own, so the excerpt, the search entry
+and the article itself always come from the same text. On PostgreSQL the search vector and
+snippets come from articles.content, so every duplicate keeps its own.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from ..core.config import settings
+from ..models.article import Article, ArticleSimhashBand
+from ..models.feed import Feed
+from .content import unpack_content
+from .search import search_reads_index
+from .text import html_text_and_image
+from .fingerprint import SIMHASH_MAX_DISTANCE, hamming_distance, simhash_bands
+
+
+def _window_start() -> datetime:
+    return datetime.utcnow() - timedelta(days=settings.DEDUP_WINDOW_DAYS)
+
+
+def _body_text(content: Optional[str], content_zlib: Optional[bytes]) -> str:
+    return html_text_and_image(unpack_content(content, content_zlib) or "")[0]
+
+
+def _drop_repeated_content(db: Session, linked: List[Tuple[dict, int]]):
+    """Drop the content of (row, original_id) pairs whose text is the original's"""
+    contents = {
+        article_id: (content, content_zlib)
+        for article_id, content, content_zlib in db.execute(
+            select(Article.id, Article.content, Article.content_zlib).where(
+                Article.id.in_({original_id for _, original_id in linked})
+            )
+        )
+    }
+    for row, original_id in linked:
+        original = contents.get(original_id)
+        if original is not None and _body_text(*original) == _body_text(row["content"], row["content_zlib"]):
+            row["content"] = None
+            row["content_zlib"] = None
+
+
+def link_duplicates(db: Session, source_id: int, rows: List[dict]) -> int:
+    """Point the new article rows of a source that repeat a recent article from another source at
+    that article, dropping content that only repeats the original's if search does not need it.
+    Changes `rows` in place; returns how many it marked."""
+    if not settings.DEDUP_ENABLED or not rows:
+        return 0
+    recent = and_(Article.source_id != source_id, Article.published_at >= _window_start())
+
+    keys = {row[key] for row in rows for key in ("url_hash", "guid_hash") if row[key] is not None}
+    originals: Dict[int, int] = {}
+    if keys:
+        matches = db.execute(
+            select(Article.id, Article.duplicate_of_id, Article.url_hash, Article.guid_hash).where(
+                recent, or_(Article.url_hash.in_(keys), Article.guid_hash.in_(keys))
+            ).order_by(Article.id)
+        )
+        for article_id, duplicate_of_id, url_hash, guid_hash in matches:
+            for key in (url_hash, guid_hash):
+                if key is not None:
+                    originals.setdefault(key, duplicate_of_id or article_id)
+
+    linked = []
+    unmatched = []
+    for row in rows:
+        original_id = originals.get(row["url_hash"]) or originals.get(row["guid_hash"])
+        if original_id:
+            row["duplicate_of_id"] = original_id
+            linked.append((row, original_id))
+        elif row["simhash"] is not None:
+            unmatched.append(row)
+    if linked and search_reads_index(db):
+        _drop_repeated_content(db, linked)
+    marked = len(linked)
+    if not unmatched:
+        return marked
+
+    values: Dict[int, set] = {}
+    for row in unmatched:
+        for band, value in simhash_bands(row["simhash"]):
+            values.setdefault(band, set()).add(value)
+    # One IN list per band, so each is a range of the band index's primary key
+    buckets: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for band, value, article_id, fingerprint in db.execute(
+        select(ArticleSimhashBand.band, ArticleSimhashBand.value, Article.id, Article.simhash).join(
+            Article, Article.id == ArticleSimhashBand.article_id
+        ).where(
+            or_(*(
+                and_(ArticleSimhashBand.band == band, ArticleSimhashBand.value.in_(band_values))
+                for band, band_values in values.items()
+            )),
+            recent,
+        )
+    ):
+        buckets.setdefault((band, value), []).append((article_id, fingerprint))
+    for row in unmatched:
+        closest = min(
+            (
+                (hamming_distance(row["simhash"], fingerprint), article_id)
+                for key in simhash_bands(row["simhash"])
+                for article_id, fingerprint in buckets.get(key, ())
+            ),
+            default=None,
+        )
+        if closest is not None and closest[0] <= SIMHASH_MAX_DISTANCE:
+            # Similar, not the same: the text differs somewhere, so the duplicate keeps its own
+            row["duplicate_of_id"] = closest[1]
+            marked += 1
+    return marked
+
+
+def index_fingerprints(db: Session, articles: Iterable[Tuple[int, Optional[int]]]):
+    """Add (article_id, simhash) of freshly stored originals to the band index"""
+    rows = [
+        {"band": band, "value": value, "article_id": article_id}
+        for article_id, fingerprint in articles if fingerprint is not None
+        for band, value in simhash_bands(fingerprint)
+    ]
+    if rows:
+        db.execute(insert(ArticleSimhashBand), rows)
+
+
+def forget_articles(db: Session, article_ids):
+    """Call before deleting articles (`article_ids` may be a list or a subquery). Each deleted
+    original that still has duplicates hands its content to the oldest of them (unless that one
+    kept its own), which becomes the original of the rest."""
+    db.execute(delete(ArticleSimhashBand).where(ArticleSimhashBand.article_id.in_(article_ids)))
+    heirs = db.execute(
+        select(Article.duplicate_of_id, func.min(Article.id)).where(
+            Article.duplicate_of_id.in_(article_ids), Article.id.not_in(article_ids)
+        ).group_by(Article.duplicate_of_id)
+    ).all()
+    for original_id, heir_id in heirs:
+        values = {"duplicate_of_id": None}
+        heir = db.execute(select(Article.content, Article.content_zlib).where(Article.id == heir_id)).one()
+        if heir.content is None and heir.content_zlib is None:
+            original = db.execute(
+                select(Article.content, Article.content_zlib).where(Article.id == original_id)
+            ).one()
+            values.update(content=original.content, content_zlib=original.content_zlib)
+        db.execute(
+            update(Article).where(Article.id == heir_id).values(**values).execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(Article).where(Article.duplicate_of_id == original_id).values(
+                duplicate_of_id=heir_id
+            ).execution_options(synchronize_session=False)
+        )
+        index_fingerprints(db, [(heir_id, db.scalar(select(Article.simhash).where(Article.id == heir_id)))])
+
+
+def prune_fingerprints(db: Session) -> int:
+    """Drop band index entries of articles too old to be matched; returns how many were removed"""
+    stale = select(ArticleSimhashBand.article_id).join(
+        Article, Article.id == ArticleSimhashBand.article_id
+    ).where(Article.published_at < _window_start())
+    return db.execute(delete(ArticleSimhashBand).where(ArticleSimhashBand.article_id.in_(stale))).rowcount
+
+
+def original_content(db: Session, article_id: int) -> Optional[str]:
+    """Content of the original a duplicate points at"""
+    row = db.execute(select(Article.content, Article.content_zlib).where(Article.id == article_id)).first()
+    return unpack_content(row.content, row.content_zlib) if row else None
+
+
+def duplicate_of_visible(user_id: int):
+    """Condition for articles that repeat an article the user also sees through another feed"""
+    original = aliased(Article)
+    return select(original.id).join(
+        Feed, and_(Feed.source_id == original.source_id, Feed.user_id == user_id)
+    ).where(original.id == Article.duplicate_of_id).exists()
@@ -0,0 +1,292 @@
+"""Per-user change notifications, streamed to clients by api/endpoints/events.py.
+
+Writers call publish() inside their transaction and the events go out once it commits.
+The memory backend delivers them within this process only. The database backend writes
+them to user_events, which every API process polls once per EVENTS_POLL_SECONDS, so
+several API workers and separate fetch workers share one stream.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, async_write_lock
+from ..models.event import UserEvent
+from ..models.feed import Feed
+
+# (user_id, type, data) as handed to publish()
+PendingEvent = Tuple[int, str, dict]
+
+PENDING_KEY = "pending_events"
+POLL_BATCH = 1000
+PRUNE_EVERY_SECONDS = 60
+# How long the poller keeps checking for a skipped id. PostgreSQL hands out ids at insert, so a
+# transaction may commit a lower id after a higher one was delivered; a rollback leaves a hole for good.
+GAP_WAIT_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    user_id: int
+    type: str
+    data: dict
+
+
+class Subscription:
+    """One open stream. The queue is bounded: a client that falls behind loses what is queued
+    and gets a single "reset" event telling it to reload, instead of growing server memory."""
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(event.id, event.user_id, "reset", {}))
+
+
+class Broadcaster:
+    """Fans events out to this process's open streams"""
+
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Set when the server shuts down; open streams end instead of holding the shutdown up
+        self.closing = asyncio.Event()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, settings.EVENTS_QUEUE_SIZE)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def open(self):
+        self.closing = asyncio.Event()
+
+    def close(self):
+        self.closing.set()
+
+    def deliver(self, events: List[Event]):
+        """Safe to call from any thread: writes commit on the write queue and in the threadpool"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(events)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: List[Event]):
+        for item in events:
+            for subscription in self._subscriptions.get(item.user_id, ()):
+                subscription.put(item)
+
+
+class MemoryBackend:
+    """Delivers events within this process and keeps the last EVENTS_BUFFER_SIZE per user for resuming.
+    Ids continue from the boot time, so they keep increasing across restarts."""
+
+    def __init__(self, broadcaster: Broadcaster):
+        self.broadcaster = broadcaster
+        self._first_id = time.time_ns() // 1000
+        self._ids = itertools.count(self._first_id)
+        self._recent: Dict[int, Deque[Event]] = {}
+        # Newest id per user that fell out of the buffer
+        self._dropped: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, db: Session, events: List[PendingEvent]):
+        db.info.setdefault(PENDING_KEY, []).extend(events)
+
+    def committed(self, pending: List[PendingEvent]):
+        with self._lock:
+            events = [Event(next(self._ids), user_id, type, data) for user_id, type, data in pending]
+            for item in events:
+                recent = self._recent.setdefault(item.user_id, deque())
+                recent.append(item)
+                if len(recent) > settings.EVENTS_BUFFER_SIZE:
+                    self._dropped[item.user_id] = recent.popleft().id
+        self.broadcaster.deliver(events)
+
+    async def replay(self, user_id: int, last_event_id: int) -> Optional[List[Event]]:
+        """Events after last_event_id, or None if some of them are no longer known"""
+        with self._lock:
+            if last_event_id < self._first_id - 1 or last_event_id < self._dropped.get(user_id, 0):
+                return None
+            return [item for item in self._recent.get(user_id, ()) if item.id > last_event_id]
+
+    async def start(self):
+        self.broadcaster.open()
+
+    async def stop(self):
+        self.broadcaster.close()
+
+
+class DatabaseBackend:
+    """Stores events in user_events; one poller per process hands new rows to its streams"""
+
+    def __init__(self, broadcaster: Broadcaster):
+        self.broadcaster = broadcaster
+        self._task: Optional[asyncio.Task] = None
+        # Highest id delivered, and ids below it not seen yet with when they were first missed
+        self._last_id = 0
+        self._gaps: Dict[int, float] = {}
+
+    def publish(self, db: Session, events: List[PendingEvent]):
+        db.execute(insert(UserEvent), [
+            {"user_id": user_id, "type": type, "data": data} for user_id, type, data in events
+        ])
+
+    def committed(self, pending: List[PendingEvent]):
+        pass
+
+    async def replay(self, user_id: int, last_event_id: int) -> Optional[List[Event]]:
+        async with AsyncSessionLocal() as db:
+            oldest = await db.scalar(select(func.min(UserEvent.id)))
+            if oldest is not None and last_event_id < oldest - 1:
+                return None
+            rows = (await db.execute(
+                select(UserEvent).where(
+                    UserEvent.user_id == user_id, UserEvent.id > last_event_id
+                ).order_by(UserEvent.id).limit(settings.EVENTS_BUFFER_SIZE + 1)
+            )).scalars().all()
+        if len(rows) > settings.EVENTS_BUFFER_SIZE:
+            return None
+        return [Event(row.id, row.user_id, row.type, row.data) for row in rows]
+
+    async def start(self):
+        self.broadcaster.open()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        self.broadcaster.close()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self):
+        async with AsyncSessionLocal() as db:
+            self._last_id = await db.scalar(select(func.max(UserEvent.id))) or 0
+        pruned_at = time.monotonic()
+        while True:
+            await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not self.broadcaster.has_subscribers:
+                        # Nobody is listening here: only keep up with the newest id
+                        self._last_id = await db.scalar(select(func.max(UserEvent.id))) or self._last_id
+                        self._gaps.clear()
+                    else:
+                        await self._deliver_new(db)
+                    if time.monotonic() - pruned_at >= PRUNE_EVERY_SECONDS:
+                        pruned_at = time.monotonic()
+                        await prune_events(db)
+            except Exception as e:
+                print(f"Error polling user events: {str(e)}")
+
+
+    async def _deliver_new(self, db):
+        now = time.monotonic()
+        self._gaps = {gap: since for gap, since in self._gaps.items() if now - since < GAP_WAIT_SECONDS}
+        new = UserEvent.id > self._last_id
+        rows = (await db.execute(
+            select(UserEvent).where(or_(new, UserEvent.id.in_(self._gaps)) if self._gaps else new)
+            .order_by(UserEvent.id).limit(POLL_BATCH)
+        )).scalars().all()
+        if not rows:
+            return
+        found = {row.id for row in rows}
+        for gap in found.intersection(self._gaps):
+            del self._gaps[gap]
+        newest = rows[-1].id
+        if newest > self._last_id:
+            for missing in range(max(self._last_id + 1, newest - POLL_BATCH), newest):
+                if missing not in found:
+                    self._gaps[missing] = now
+            self._last_id = newest
+        self.broadcaster.deliver([Event(row.id, row.user_id, row.type, row.data) for row in rows])
+
+
+async def prune_events(db):
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.EVENTS_RETENTION_MINUTES)
+    async with async_write_lock(db):
+        await db.execute(delete(UserEvent).where(UserEvent.created_at < cutoff))
+        await db.commit()
+
+
+BACKENDS = {"memory": MemoryBackend, "database": DatabaseBackend}
+if settings.EVENTS_BACKEND not in BACKENDS:
+    raise ValueError(f"EVENTS_BACKEND must be one of {', '.join(BACKENDS)}")
+
+broadcaster = Broadcaster()
+backend = BACKENDS[settings.EVENTS_BACKEND](broadcaster)
+
+
+def publish(db: Session, events: Iterable[PendingEvent]):
+    """Send (user_id, type, data) events once db's current transaction commits"""
+    events = list(events)
+    if events:
+        backend.publish(db, events)
+
+
+def _subscriptions(db: Session, source_id: int):
+    return db.execute(select(Feed.user_id, Feed.id).where(Feed.source_id == source_id))
+
+
+def new_articles_events(db: Session, source_id: int, count: int) -> List[PendingEvent]:
+    """"articles" events for every subscriber of a source that received new articles"""
+    return [
+        (user_id, "articles", {"feed_id": feed_id, "new": count})
+        for user_id, feed_id in _subscriptions(db, source_id)
+    ]
+
+
+def feed_status_events(db: Session, source_id: int, fetch_status: str) -> List[PendingEvent]:
+    """"feeds" events for every subscriber of a source whose fetch status changed"""
+    return [
+        (user_id, "feeds", {"feed_id": feed_id, "fetch_status": fetch_status})
+        for user_id, feed_id in _subscriptions(db, source_id)
+    ]
+
+
+def counts_event(user_id: int, feed_ids: Iterable[int]) -> PendingEvent:
+    """A user's read/starred counts changed in these feeds"""
+    return (user_id, "counts", {"feed_ids": sorted(set(feed_ids))})
+
+
+@event.listens_for(Session, "after_commit")
+def _send_pending(session: Session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        backend.committed(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,140 @@
+"""Feed parsing that runs in worker processes.
+
+Everything here must stay picklable and cheap to import: parse_feed() is executed in
+a ProcessPoolExecutor and returns plain data to the event loop.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+import feedparser
+
+from .fingerprint import clean_link, guid_hash, link_hash, simhash
+from .text import absolute_image_url, html_text_and_image, make_excerpt, reading_time_minutes
+
+# Channel-level fields the polling schedule looks at
+FEED_INFO_KEYS = ("ttl", "sy_updateperiod", "sy_updatefrequency")
+
+
+@dataclass
+class ParsedEntry:
+    guid: Optional[str]
+    title: str
+    link: str
+    content: str
+    author: str
+    published_at: datetime
+    has_date: bool
+    # Plain text of the content, for the search index
+    text: str = ""
+    excerpt: str = ""
+    reading_time: int = 0
+    lead_image: Optional[str] = None
+    # The link as the feed had it, when tracking parameters were removed from `link`
+    original_link: Optional[str] = None
+    # Identity across feeds, see services/fingerprint.py
+    url_hash: Optional[int] = None
+    guid_hash: Optional[int] = None
+    simhash: Optional[int] = None
+
+
+@dataclass
+class ParsedFeed:
+    title: Optional[str] = None
+    info: dict = field(default_factory=dict)
+    entries: List[ParsedEntry] = field(default_factory=list)
+
+
+def parse_article_date(date_struct) -> datetime:
+    if date_struct:
+        try:
+            return datetime(*date_struct[:6])
+        except:
+            pass
+    return datetime.utcnow()
+
+
+def media_image(entry) -> Optional[str]:
+    """Image the feed itself attaches to an entry (Media RSS thumbnail/content, or an enclosure)"""
+    for thumbnail in entry.get('media_thumbnail') or []:
+        if thumbnail.get('url'):
+            return thumbnail['url']
+    for media in entry.get('media_content') or []:
+        if media.get('url') and (media.get('medium') == 'image' or (media.get('type') or '').startswith('image/')):
+            return media['url']
+    for enclosure in entry.get('enclosures') or []:
+        if enclosure.get('href') and (enclosure.get('type') or '').startswith('image/'):
+            return enclosure['href']
+    return None
+
+
+def parse_feed(content: bytes) -> ParsedFeed:
+    parsed = feedparser.parse(content)
+    entries = []
+    for entry in parsed.entries:
+        original_link = entry.get('link', '')
+        if not original_link:
+            continue
+        link = clean_link(original_link)
+        guid = entry.get('id') or None
+        title = entry.get('title', 'No Title')
+        date_struct = entry.get('published_parsed') or entry.get('updated_parsed')
+        body = entry.get('summary', entry.get('description', ''))
+        text, first_image = html_text_and_image(body)
+        entries.append(ParsedEntry(
+            guid=guid,
+            title=title,
+            link=link,
+            content=body,
+            author=entry.get('author', ''),
+            published_at=parse_article_date(date_struct),
+            has_date=bool(date_struct),
+            text=text,
+            excerpt=make_excerpt(text),
+            reading_time=reading_time_minutes(text),
+            lead_image=absolute_image_url(media_image(entry) or first_image, link),
+            original_link=original_link if original_link != link else None,
+            url_hash=link_hash(link),
+            guid_hash=guid_hash(guid),
+            simhash=simhash(f"{title} {text}"),
+        ))
+    return ParsedFeed(
+        title=parsed.feed.get('title') or None,
+        info={key: parsed.feed.get(key) for key in FEED_INFO_KEYS if parsed.feed.get(key)},
+        entries=entries,
+    )
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parser_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: never fork the API process with its open sockets and DB connections
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_parser_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def parse_feed_async(content: bytes, workers: int) -> ParsedFeed:
+    """Parse off the event loop: in a process pool, or a thread when workers is 0"""
+    if workers <= 0:
+        return await asyncio.to_thread(parse_feed, content)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_parser_pool(workers), parse_feed, content)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for the next feed
+        shutdown_parser_pool()
+        raise
@@ -0,0 +1,94 @@
+import random
+import re
+from datetime import datetime
+from statistics import median
+from typing import List, Optional
+from ..core.config import settings
+
+SY_UPDATE_PERIOD_MINUTES = {
+    "hourly": 60,
+    "daily": 60 * 24,
+    "weekly": 60 * 24 * 7,
+    "monthly": 60 * 24 * 30,
+    "yearly": 60 * 24 * 365,
+}
+
+# How much an idle feed's interval grows after a poll that found nothing new
+IDLE_BACKOFF_FACTOR = 1.5
+CADENCE_SAMPLE_SIZE = 20
+# Past this many doublings every failing source is at the cap anyway
+MAX_BACKOFF_DOUBLINGS = 16
+
+
+def parse_cache_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Return the max-age of a Cache-Control header in seconds"""
+    if not cache_control:
+        return None
+    match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+    return int(match.group(1)) if match else None
+
+
+def feed_hint_minutes(feed_info: Optional[dict], max_age: Optional[int] = None) -> Optional[float]:
+    """Shortest refresh interval the publisher asks for via <ttl>, sy:update* or Cache-Control"""
+    hints = []
+    if max_age:
+        hints.append(max_age / 60)
+    if feed_info:
+        try:
+            ttl = int(feed_info.get("ttl") or 0)
+            if ttl > 0:
+                hints.append(ttl)
+        except (TypeError, ValueError):
+            pass
+        period = SY_UPDATE_PERIOD_MINUTES.get(str(feed_info.get("sy_updateperiod", "")).strip().lower())
+        if period:
+            try:
+                frequency = max(int(feed_info.get("sy_updatefrequency") or 1), 1)
+            except (TypeError, ValueError):
+                frequency = 1
+            hints.append(period / frequency)
+    return max(hints) if hints else None
+
+
+def publish_cadence_minutes(published: List[datetime], now: datetime) -> Optional[float]:
+    """Median gap between recent entries, counting the time since the newest one"""
+    recent = sorted((d for d in published if d <= now), reverse=True)[:CADENCE_SAMPLE_SIZE]
+    if not recent:
+        return None
+    points = [now] + recent
+    gaps = [(newer - older).total_seconds() / 60 for newer, older in zip(points, points[1:])]
+    return median(gaps) if gaps else None
+
+
+def next_fetch_interval(
+    previous_minutes: Optional[int],
+    published: List[datetime],
+    new_articles: int,
+    hint_minutes: Optional[float],
+    now: datetime,
+) -> int:
+    """Minutes until a source should be polled again"""
+    previous = previous_minutes or settings.RSS_FETCH_INTERVAL_MINUTES
+    cadence = publish_cadence_minutes(published, now)
+
+    # Poll about twice per expected new entry
+    interval = cadence / 2 if cadence is not None else previous
+    if not new_articles:
+        interval = max(interval, previous * IDLE_BACKOFF_FACTOR)
+    if hint_minutes:
+        interval = max(interval, hint_minutes)
+
+    interval = max(interval, settings.RSS_FETCH_MIN_INTERVAL_MINUTES)
+    interval = min(interval, settings.RSS_FETCH_MAX_INTERVAL_MINUTES)
+    return int(round(interval))
+
+
+def failure_backoff_minutes(previous_minutes: Optional[int], failures: int, gone: bool = False) -> float:
+    """Minutes until a failing source is retried: its interval doubled per consecutive failure,
+    capped, and jittered so sources that failed together do not all retry together"""
+    interval = previous_minutes or settings.RSS_FETCH_INTERVAL_MINUTES
+    delay = interval * 2 ** min(max(failures, 1) - 1, MAX_BACKOFF_DOUBLINGS)
+    # 410 Gone says the feed will not come back; still check now and then in case it does
+    if gone or delay > settings.RSS_FETCH_BACKOFF_MAX_MINUTES:
+        delay = settings.RSS_FETCH_BACKOFF_MAX_MINUTES
+    return delay * random.uniform(1 - settings.RSS_FETCH_BACKOFF_JITTER, 1)
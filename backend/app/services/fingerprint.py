@@ -0,0 +1,150 @@
+"""Article identity for duplicate detection: canonical links and SimHash fingerprints.
+
+Runs in the feed parser workers, so it only uses the standard library.
+"""
+import hashlib
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the click, never select the content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "twclid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url", "cmpid", "ncid",
+}
+TRACKING_PREFIXES = ("utm_",)
+# Marks an AMP rendering of a page that also exists without it
+AMP_PARAMS = {"amp", "outputtype"}
+AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+GLOBAL_GUID_PREFIXES = ("tag:", "urn:")
+
+SIMHASH_BITS = 64
+# Six bands of 10-11 bits: two fingerprints at most 5 bits apart agree on at least one whole band.
+# A few edited words or an added footer move a fingerprint by about 2-8 bits; unrelated texts
+# are around 32 bits apart.
+SIMHASH_BAND_WIDTHS = (11, 11, 11, 11, 10, 10)
+SIMHASH_MAX_DISTANCE = len(SIMHASH_BAND_WIDTHS) - 1
+# Shorter texts share too many shingles by chance to be told apart reliably
+SIMHASH_MIN_WORDS = 40
+SIMHASH_MAX_WORDS = 2000
+SHINGLE_SIZE = 2
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def clean_link(url: str) -> str:
+    """The link without tracking parameters, with a lowercase scheme and host and no default port.
+    Still the page the feed pointed at, so it is what gets stored and opened."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in DEFAULT_PORTS or not parts.hostname:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+    query = parts.query
+    params = parse_qsl(query, keep_blank_values=True)
+    kept = [(name, value) for name, value in params if not _is_tracking(name)]
+    if len(kept) < len(params):
+        # Re-encoded only when something was removed, so other links keep their exact query
+        query = urlencode(kept)
+    # "#!" fragments are routes of old single-page sites; other fragments only scroll
+    fragment = parts.fragment if parts.fragment.startswith("!") else ""
+    return urlunsplit((scheme, netloc, parts.path or "/", query, fragment))
+
+
+def canonical_key(url: str) -> str:
+    """What two links to the same story have in common: no scheme, www., AMP variant, trailing
+    slash or tracking parameters, and the query in a fixed order"""
+    parts = urlsplit(clean_link(url))
+    host = (parts.hostname or "").lower()
+    path = parts.path
+    if host.endswith(AMP_CACHE_SUFFIX):
+        # Google AMP cache: /c/s/example.com/story -> example.com/story
+        segments = path.split("/")
+        if len(segments) > 3 and segments[1] in ("c", "v", "i"):
+            if segments[2] == "s":
+                segments = segments[1:]
+            host, path = segments[2].lower(), "/" + "/".join(segments[3:])
+    for prefix in ("www.", "amp.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    segments = [segment for segment in path.split("/") if segment]
+    if segments and segments[-1].lower() == "amp":
+        segments = segments[:-1]
+    if segments and segments[-1].lower().endswith(".amp"):
+        segments[-1] = segments[-1][:-4]
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in AMP_PARAMS
+    )
+    key = host + "/" + "/".join(segments)
+    if query:
+        key += "?" + urlencode(query)
+    return key
+
+
+def _signed(value: int) -> int:
+    # Stored in signed 64-bit integer columns
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _hash64(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def link_hash(url: str) -> Optional[int]:
+    """64-bit hash of the link's canonical key, indexed for exact lookups; None unless it is an http(s) link"""
+    if urlsplit(url).scheme.lower() not in DEFAULT_PORTS:
+        return None
+    return _signed(_hash64(canonical_key(url)))
+
+
+def guid_hash(guid: Optional[str]) -> Optional[int]:
+    """Hash of a GUID that names the story beyond one feed (a link, or a tag: or urn: URI); None
+    for feed-local ids such as post numbers"""
+    if not guid:
+        return None
+    guid = guid.strip()
+    if guid.lower().startswith(GLOBAL_GUID_PREFIXES):
+        return _signed(_hash64(guid))
+    return link_hash(guid)
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of the word shingles of `text`, or None if it is too short to compare"""
+    words = _WORD.findall(text.lower())[:SIMHASH_MAX_WORDS]
+    if len(words) < SIMHASH_MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = [format(_hash64(shingle), "064b") for shingle in shingles]
+    # Column-wise bit counts; each bit is set if most shingles have it set
+    bits = "".join("1" if column.count("1") * 2 > len(hashes) else "0" for column in zip(*hashes))
+    return _signed(int(bits, 2))
+
+
+def simhash_bands(fingerprint: int) -> List[Tuple[int, int]]:
+    """(band, value) pairs of a fingerprint for the band index"""
+    unsigned = fingerprint & ((1 << SIMHASH_BITS) - 1)
+    bands = []
+    for band, width in enumerate(SIMHASH_BAND_WIDTHS):
+        bands.append((band, unsigned & ((1 << width) - 1)))
+        unsigned >>= width
+    return bands
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << SIMHASH_BITS) - 1)).bit_count()
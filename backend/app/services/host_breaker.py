@@ -0,0 +1,64 @@
+"""Per-host circuit breaker for feed fetching.
+
+After RSS_HOST_FAILURE_THRESHOLD consecutive fetches from a host fail at the host level
+(timeouts, refused connections, 5xx), its circuit opens: the host's feeds fail at once
+without a request for RSS_HOST_OPEN_SECONDS. Then one trial fetch is let through; success
+closes the circuit, failure keeps it open for another period. State is kept per process.
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from ..core.config import settings
+
+# Errors that say something about the host rather than one feed on it (404, parse errors, ...)
+HOST_FAILURE_KINDS = {"timeout", "connection", "http_5xx"}
+# Errors on our side (no free connection in the pool) that say nothing either way
+LOCAL_ERROR_KINDS = {"pool"}
+
+
+@dataclass
+class HostState:
+    failures: int = 0
+    open_until: float = 0.0
+
+
+class HostCircuitBreaker:
+    def __init__(self, threshold: Optional[int] = None, open_seconds: Optional[float] = None):
+        self.threshold = threshold or settings.RSS_HOST_FAILURE_THRESHOLD
+        self.open_seconds = open_seconds if open_seconds is not None else settings.RSS_HOST_OPEN_SECONDS
+        # Only hosts whose last fetch failed are tracked
+        self._hosts: Dict[str, HostState] = {}
+
+    def allow(self, host: str) -> bool:
+        """Whether a fetch from the host may go out now"""
+        state = self._hosts.get(host)
+        if state is None or state.failures < self.threshold:
+            return True
+        now = time.monotonic()
+        if now < state.open_until:
+            return False
+        # The trial fetch; the rest wait another period even if it never reports back
+        state.open_until = now + self.open_seconds
+        return True
+
+    def retry_after(self, host: str) -> float:
+        """Seconds until the host's open circuit lets a fetch through again"""
+        state = self._hosts.get(host)
+        return max(state.open_until - time.monotonic(), 0.0) if state else 0.0
+
+    def record(self, host: str, error_kind: Optional[str]):
+        """Record the outcome of a fetch that was allowed"""
+        if error_kind in LOCAL_ERROR_KINDS:
+            return
+        if error_kind not in HOST_FAILURE_KINDS:
+            self._hosts.pop(host, None)
+            return
+        state = self._hosts.setdefault(host, HostState())
+        state.failures += 1
+        if state.failures >= self.threshold:
+            if state.failures == self.threshold:
+                print(f"Host {host} failed {state.failures} times in a row; pausing its feeds")
+            state.open_until = time.monotonic() + self.open_seconds
+
+
+breaker = HostCircuitBreaker()
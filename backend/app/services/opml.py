@@ -0,0 +1,139 @@
+"""OPML import and export of a user's subscriptions"""
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..core.database import dialect_insert
+from ..models.feed import Feed, FeedSource
+from .counters import initialize_counters
+from .versions import bump_versions
+
+# Larger than any real subscription list; keeps a hostile upload from being parsed at all
+MAX_OPML_BYTES = 5 * 1024 * 1024
+
+
+@dataclass
+class OPMLFeed:
+    url: str
+    title: str
+    description: Optional[str] = None
+    category: Optional[str] = None
+
+
+@dataclass
+class ImportResult:
+    feed_ids: List[int] = field(default_factory=list)
+    already_subscribed: int = 0
+    # Sources nobody had fetched yet; the caller starts their first fetch
+    pending_source_ids: List[int] = field(default_factory=list)
+
+
+def parse_opml(data: bytes) -> Tuple[List[OPMLFeed], int]:
+    """Feeds in an OPML document, first occurrence of each URL, and the number of outlines skipped
+    for not having an http(s) URL. Nested outlines without a feed URL act as categories."""
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f"Not a valid OPML file: {e}")
+    body = root.find("body")
+    if root.tag != "opml" or body is None:
+        raise ValueError("Not a valid OPML file: missing <opml> or <body>")
+
+    feeds: Dict[str, OPMLFeed] = {}
+    invalid = 0
+
+    def walk(element, category: Optional[str]):
+        nonlocal invalid
+        for outline in element.findall("outline"):
+            url = (outline.get("xmlUrl") or "").strip()
+            label = (outline.get("title") or outline.get("text") or "").strip()
+            if not url:
+                walk(outline, label or category)
+                continue
+            if urlsplit(url).scheme not in ("http", "https"):
+                invalid += 1
+                continue
+            if url not in feeds:
+                feeds[url] = OPMLFeed(
+                    url=url,
+                    title=label or url,
+                    description=outline.get("description"),
+                    category=category,
+                )
+
+    walk(body, None)
+    return list(feeds.values()), invalid
+
+
+def import_subscriptions(db: Session, user_id: int, feeds: List[OPMLFeed]) -> ImportResult:
+    """Subscribe the user to every feed in one transaction; already subscribed ones are skipped"""
+    result = ImportResult()
+    if not feeds:
+        return result
+
+    urls = [feed.url for feed in feeds]
+    # Another import may create the same sources concurrently
+    db.execute(
+        dialect_insert(db, FeedSource.__table__).on_conflict_do_nothing(),
+        [{"url": url, "created_at": datetime.utcnow()} for url in urls],
+    )
+    sources = {
+        row.url: row for row in db.execute(
+            select(FeedSource.id, FeedSource.url, FeedSource.last_fetched).where(FeedSource.url.in_(urls))
+        )
+    }
+    subscribed = set(db.scalars(select(Feed.source_id).where(
+        Feed.user_id == user_id, Feed.source_id.in_([source.id for source in sources.values()])
+    )))
+
+    new_feeds = []
+    for feed in feeds:
+        source = sources[feed.url]
+        if source.id in subscribed:
+            result.already_subscribed += 1
+            continue
+        new_feeds.append(Feed(
+            user_id=user_id,
+            source_id=source.id,
+            title=feed.title,
+            description=feed.description,
+            category=feed.category,
+        ))
+        if source.last_fetched is None:
+            result.pending_source_ids.append(source.id)
+    if not new_feeds:
+        return result
+
+    db.add_all(new_feeds)
+    db.flush()
+    result.feed_ids = [feed.id for feed in new_feeds]
+    initialize_counters(db, result.feed_ids)
+    db.execute(bump_versions(user_id, counts=True, articles=True))
+    return result
+
+
+def build_opml(feeds: List[Feed], title: str) -> bytes:
+    """OPML 2.0 document with one outline per subscription, grouped by category"""
+    root = ET.Element("opml", version="2.0")
+    head = ET.SubElement(root, "head")
+    ET.SubElement(head, "title").text = title
+    ET.SubElement(head, "dateCreated").text = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    body = ET.SubElement(root, "body")
+
+    folders: Dict[str, ET.Element] = {}
+    for feed in sorted(feeds, key=lambda feed: (feed.category or "", feed.title.lower())):
+        parent = body
+        if feed.category:
+            if feed.category not in folders:
+                folders[feed.category] = ET.SubElement(body, "outline", text=feed.category, title=feed.category)
+            parent = folders[feed.category]
+        attributes = {"type": "rss", "text": feed.title, "title": feed.title, "xmlUrl": feed.url}
+        if feed.description:
+            attributes["description"] = feed.description
+        ET.SubElement(parent, "outline", attributes)
+
+    ET.indent(root)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
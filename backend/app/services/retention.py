@@ -0,0 +1,194 @@
+"""Article retention: old articles are deleted in small batches, starred ones never."""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, delete, desc, false, func, or_, select, text, true, tuple_
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal, dialect_insert, engine
+from ..core.write_queue import run_write
+from ..models.article import Article, PrunedArticle, UserArticle
+from ..models.feed import Feed, FeedSource
+from .counters import apply_deltas
+from .dedup import forget_articles, prune_fingerprints
+from .search import unindex_articles
+from .versions import bump_versions, source_subscribers
+
+# Pages released per incremental_vacuum step (4 KiB each), so no step holds the write lock for long
+VACUUM_STEP_PAGES = 2000
+
+
+@dataclass
+class RetentionPolicy:
+    """Limits for one feed source; None keeps everything"""
+    keep_days: Optional[int] = None
+    keep_max_articles: Optional[int] = None
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.keep_days or self.keep_max_articles)
+
+
+def _most_lenient(values: List[Optional[int]], default: int) -> Optional[int]:
+    # Articles are shared, so a source keeps what its most demanding subscriber wants
+    resolved = [default if value is None else value for value in values]
+    if not resolved or 0 in resolved:
+        return None
+    return max(resolved)
+
+
+def source_policies(db: Session, source_ids: Optional[Iterable[int]] = None) -> Dict[int, RetentionPolicy]:
+    query = db.query(Feed.source_id, Feed.keep_days, Feed.keep_max_articles)
+    if source_ids is not None:
+        query = query.filter(Feed.source_id.in_(list(source_ids)))
+    grouped: Dict[int, Tuple[list, list]] = {}
+    for source_id, keep_days, keep_max_articles in query:
+        days, max_articles = grouped.setdefault(source_id, ([], []))
+        days.append(keep_days)
+        max_articles.append(keep_max_articles)
+    return {
+        source_id: RetentionPolicy(
+            keep_days=_most_lenient(days, settings.RETENTION_DAYS),
+            keep_max_articles=_most_lenient(max_articles, settings.RETENTION_MAX_ARTICLES_PER_FEED),
+        )
+        for source_id, (days, max_articles) in grouped.items()
+    }
+
+
+def prunable_condition(db: Session, source_id: int, policy: RetentionPolicy, now: datetime):
+    """WHERE clause for the source's articles that the policy lets go, or None"""
+    limits = []
+    if policy.keep_days:
+        limits.append(Article.published_at < now - timedelta(days=policy.keep_days))
+    if policy.keep_max_articles:
+        # Everything older than the Nth newest article, in timeline order
+        boundary = db.execute(
+            select(Article.published_at, Article.id).where(Article.source_id == source_id)
+            .order_by(desc(Article.published_at), desc(Article.id))
+            .offset(policy.keep_max_articles - 1).limit(1)
+        ).first()
+        if boundary:
+            limits.append(tuple_(Article.published_at, Article.id) < tuple_(*boundary))
+    if not limits:
+        return None
+    starred = select(UserArticle.article_id).where(
+        UserArticle.article_id == Article.id, UserArticle.is_starred == true()
+    )
+    return and_(Article.source_id == source_id, or_(*limits), ~starred.exists())
+
+
+def count_prunable(db: Session, source_id: int, policy: RetentionPolicy, now: Optional[datetime] = None) -> int:
+    condition = prunable_condition(db, source_id, policy, now or datetime.utcnow())
+    if condition is None:
+        return 0
+    return db.scalar(select(func.count(Article.id)).where(condition))
+
+
+def _prune_batch(db: Session, source_id: int, policy: RetentionPolicy, now: datetime, batch_size: int) -> int:
+    condition = prunable_condition(db, source_id, policy, now)
+    if condition is None:
+        return 0
+    rows = db.execute(
+        select(Article.id, Article.published_at, Article.link, Article.guid).where(condition)
+        .order_by(Article.published_at, Article.id).limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+    ids = [row.id for row in rows]
+
+    unread = db.execute(
+        select(Feed.id, func.count(Article.id)).select_from(Article).join(
+            Feed, Feed.source_id == Article.source_id
+        ).outerjoin(
+            UserArticle, and_(UserArticle.article_id == Article.id, UserArticle.user_id == Feed.user_id)
+        ).where(
+            Article.id.in_(ids), func.coalesce(UserArticle.is_read, false()) == false()
+        ).group_by(Feed.id)
+    ).all()
+    apply_deltas(db, {feed_id: (-count, 0) for feed_id, count in unread})
+
+    db.execute(delete(UserArticle).where(UserArticle.article_id.in_(ids)))
+    forget_articles(db, ids)
+    unindex_articles(db, ids)
+    db.execute(delete(Article).where(Article.id.in_(ids)))
+    # Undated entries get the fetch time as their date, so pruned_before cannot keep them out
+    db.execute(dialect_insert(db, PrunedArticle.__table__).on_conflict_do_nothing(), [
+        {"source_id": source_id, "link": row.link, "guid": row.guid} for row in rows
+    ])
+
+    source = db.get(FeedSource, source_id)
+    newest = max(row.published_at for row in rows)
+    if source.pruned_before is None or source.pruned_before < newest:
+        source.pruned_before = newest
+    db.execute(bump_versions(source_subscribers(source_id), counts=True, articles=True))
+    return len(ids)
+
+
+def forget_pruned(db: Session, source_id: int, links: Iterable[str]):
+    """Drop the pruned articles of a source whose entries are no longer among `links`, the feed's current ones"""
+    db.execute(delete(PrunedArticle).where(
+        PrunedArticle.source_id == source_id, PrunedArticle.link.not_in(list(links))
+    ))
+
+
+def prune_source(db: Session, source_id: int, policy: RetentionPolicy, batch_size: int) -> int:
+    """Delete the source's prunable articles, committing one short transaction per batch"""
+    now = datetime.utcnow()
+    deleted = 0
+    while True:
+        count = run_write(db, lambda session: _prune_batch(session, source_id, policy, now, batch_size))
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def prune_articles(db: Session, dry_run: bool = False, source_ids: Optional[Iterable[int]] = None) -> Dict[int, int]:
+    """Articles deleted per source, or only counted with dry_run"""
+    results = {}
+    for source_id, policy in source_policies(db, source_ids).items():
+        if not policy.limited:
+            continue
+        if dry_run:
+            count = count_prunable(db, source_id, policy)
+        else:
+            count = prune_source(db, source_id, policy, settings.RETENTION_BATCH_SIZE)
+        if count:
+            results[source_id] = count
+    return results
+
+
+def compact_database():
+    """Hand freed pages back to the filesystem and refresh planner statistics"""
+    if engine.dialect.name == "postgresql":
+        # autovacuum reclaims the space; fresh statistics keep the plans right after a big delete
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE articles"))
+            conn.execute(text("ANALYZE user_articles"))
+        return
+    if engine.dialect.name != "sqlite":
+        return
+
+    raw = engine.raw_connection()
+    try:
+        connection = raw.driver_connection
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            while connection.execute("PRAGMA freelist_count").fetchone()[0]:
+                # executescript steps the pragma to completion (execute() frees a single page)
+                connection.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+        else:
+            print("Freed pages are reused but the file does not shrink; run `python prune_articles.py --vacuum` once")
+        connection.execute("PRAGMA optimize")
+    finally:
+        raw.close()
+
+
+def prune_old_articles():
+    db = SessionLocal()
+    try:
+        results = prune_articles(db)
+        if results:
+            print(f"Retention: deleted {sum(results.values())} articles from {len(results)} feeds")
+            compact_database()
+        run_write(db, prune_fingerprints)
+    finally:
+        db.close()
@@ -1,73 +1,699 @@
-import feedparser
+import asyncio
+import hashlib
+import os
+import socket
+import time
 import httpx
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..models.feed import Feed
-from ..models.article import Article
-from ..core.database import SessionLocal
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+from ..models.feed import FeedSource
+from ..models.article import Article, PrunedArticle
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal, async_write_lock, dialect_insert
+from ..core.metrics import (
+    DUPLICATE_ARTICLES, FETCH_CYCLE_SECONDS, FETCH_STAGE_SECONDS, SCHEDULER_LAG_SECONDS, observe_fetch,
+)
+from .content import pack_content
+from .counters import add_new_articles
+from .dedup import index_fingerprints, link_duplicates
+from .events import feed_status_events, new_articles_events, publish
+from .feed_parser import ParsedEntry, ParsedFeed, parse_feed_async
+from .host_breaker import HostCircuitBreaker, breaker as host_breaker
+from .retention import forget_pruned
+from .search import index_articles, search_reads_index
+from .versions import bump_versions, source_subscribers
+from .fetch_schedule import failure_backoff_minutes, feed_hint_minutes, next_fetch_interval, parse_cache_max_age
 
+_http_client: Optional[httpx.AsyncClient] = None
 
-async def fetch_feed_content(url: str) -> dict:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.get(url)
+# Identifies this process in feed_sources.lease_owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# last_error is shown next to the feed, so it is kept to one short line
+ERROR_MAX_LENGTH = 200
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared, pooled HTTP client used for all feed requests"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            # Dead hosts mostly fail at connect; don't let them hold a slot for the whole timeout
+            timeout=httpx.Timeout(settings.RSS_FETCH_TIMEOUT_SECONDS, connect=settings.RSS_FETCH_CONNECT_TIMEOUT_SECONDS),
+            http2=settings.RSS_FETCH_HTTP2,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.RSS_FETCH_CONCURRENCY,
+                max_keepalive_connections=settings.RSS_FETCH_CONCURRENCY,
+                keepalive_expiry=60.0,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@dataclass
+class FetchResult:
+    status: str  # "ok", "not_modified", "unchanged", "error" or "skipped" (not requested)
+    feed_data: Optional[ParsedFeed] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    max_age: Optional[int] = None
+    bytes_downloaded: int = 0
+    error: Optional[str] = None
+    error_kind: Optional[str] = None  # coarse class of the error, for metrics
+    status_code: Optional[int] = None
+    # Where the feed permanently moved to (301/308), if it did
+    redirect_url: Optional[str] = None
+    # Seconds until the host's circuit reopens, for fetches skipped because of it (error_kind "circuit_open")
+    retry_after: Optional[float] = None
+
+
+@dataclass
+class FetchCycleStats:
+    feeds: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    not_modified: int = 0
+    unchanged: int = 0
+    new_articles: int = 0
+    bytes_downloaded: int = 0
+    in_flight: int = 0
+    in_flight_peak: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    wall_time: float = 0.0
+
+    @property
+    def feeds_per_second(self) -> float:
+        return self.feeds / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def not_modified_rate(self) -> float:
+        return self.not_modified / self.succeeded if self.succeeded else 0.0
+
+    @property
+    def unchanged_rate(self) -> float:
+        return self.unchanged / self.succeeded if self.succeeded else 0.0
+
+    def record(self, result: FetchResult):
+        self.bytes_downloaded += result.bytes_downloaded
+        if result.status == "skipped":
+            self.skipped += 1
+            return
+        if result.status == "error":
+            self.failed += 1
+            return
+        self.succeeded += 1
+        if result.status == "not_modified":
+            self.not_modified += 1
+        elif result.status == "unchanged":
+            self.unchanged += 1
+
+    def finish(self):
+        self.wall_time = time.perf_counter() - self.started_at
+
+    def __str__(self) -> str:
+        return (
+            f"{self.feeds} feeds in {self.wall_time:.2f}s "
+            f"({self.feeds_per_second:.1f} feeds/s, peak in-flight {self.in_flight_peak}), "
+            f"{self.succeeded} ok, {self.failed} failed, {self.skipped} skipped for failing hosts, "
+            f"{self.new_articles} new articles, "
+            f"{self.bytes_downloaded} bytes downloaded, "
+            f"304 hit rate {self.not_modified_rate:.0%}, unchanged body rate {self.unchanged_rate:.0%}"
+        )
+
+
+class FetchEngine:
+    """Bounds concurrent feed requests globally and per remote host, and skips hosts whose circuit is open"""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        per_host: Optional[int] = None,
+        breaker: Optional[HostCircuitBreaker] = None,
+    ):
+        self._global = asyncio.Semaphore(concurrency or settings.RSS_FETCH_CONCURRENCY)
+        self._per_host = per_host or settings.RSS_FETCH_PER_HOST_CONCURRENCY
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._breaker = breaker or host_breaker
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host)
+        return self._hosts[host]
+
+    async def fetch(
+        self,
+        url: str,
+        stats: Optional[FetchCycleStats] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> FetchResult:
+        host = urlsplit(url).hostname or ""
+        # Wait for the host slot first so a busy host never holds a global slot idle
+        async with self._host_semaphore(host):
+            # Checked after the wait: the circuit may have opened while this fetch was queued
+            if not self._breaker.allow(host):
+                return FetchResult(
+                    status="skipped", error=f"Skipped: {host} keeps failing, retrying later", error_kind="circuit_open",
+                    retry_after=self._breaker.retry_after(host),
+                )
+            async with self._global:
+                if stats is not None:
+                    stats.in_flight += 1
+                    stats.in_flight_peak = max(stats.in_flight_peak, stats.in_flight)
+                try:
+                    result = await fetch_feed_content(url, etag, last_modified, content_hash)
+                    self._breaker.record(host, result.error_kind)
+                    return result
+                finally:
+                    if stats is not None:
+                        stats.in_flight -= 1
+
+
+_fetch_engine: Optional[FetchEngine] = None
+_fetch_engine_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_fetch_engine() -> FetchEngine:
+    """Return the process-wide FetchEngine: fetch cycles, manual refreshes, new subscriptions and
+    imports all share its limits, which the HTTP client's connection pool is sized to"""
+    global _fetch_engine, _fetch_engine_loop
+    loop = asyncio.get_running_loop()
+    # Semaphores belong to the loop that first used them
+    if _fetch_engine is None or _fetch_engine_loop is not loop:
+        _fetch_engine = FetchEngine()
+        _fetch_engine_loop = loop
+    return _fetch_engine
+
+
+# Content types a feed is never served as; anything else (including a missing header) is parsed
+REJECTED_CONTENT_TYPES = ("image/", "audio/", "video/", "font/", "application/pdf", "application/zip")
+
+
+class FetchAborted(Exception):
+    """The response was abandoned before parsing; the message is recorded on the source"""
+
+    def __init__(self, message: str, kind: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def error_kind(e: Exception) -> str:
+    if isinstance(e, FetchAborted):
+        return e.kind
+    if isinstance(e, httpx.PoolTimeout):
+        # Waited for a connection of our own pool; says nothing about the host
+        return "pool"
+    if isinstance(e, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"http_{e.response.status_code // 100}xx"
+    if isinstance(e, httpx.TransportError):
+        return "connection"
+    return "other"
+
+
+def error_message(e: Exception) -> str:
+    """One line for last_error; httpx's status errors span several lines and link to MDN"""
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"HTTP {e.response.status_code} {e.response.reason_phrase}".strip()
+    lines = str(e).strip().splitlines()
+    if isinstance(e, FetchAborted) and lines:
+        message = lines[0]
+    else:
+        message = f"{type(e).__name__}: {lines[0]}" if lines else type(e).__name__
+    return message[:ERROR_MAX_LENGTH]
+
+
+def permanent_redirect(response: httpx.Response) -> Optional[str]:
+    """The URL a feed moved to, following redirects only as long as they are permanent"""
+    target = None
+    destinations = [hop.url for hop in response.history[1:]] + [response.url]
+    for hop, destination in zip(response.history, destinations):
+        if hop.status_code not in (301, 308):
+            break
+        target = str(destination)
+    return target
+
+
+def check_content_type(content_type: Optional[str]):
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type.startswith(REJECTED_CONTENT_TYPES):
+        raise FetchAborted(f"Unexpected content type {media_type}", "content_type")
+
+
+async def read_limited(response: httpx.Response, max_bytes: int) -> bytes:
+    """Read a streamed body, giving up as soon as it grows past max_bytes"""
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise FetchAborted(f"Feed is larger than {max_bytes} bytes (Content-Length {length})", "too_large")
+    chunks = []
+    received = 0
+    # Counts decoded bytes, so a small compressed body cannot inflate past the cap either
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if received > max_bytes:
+            raise FetchAborted(f"Feed is larger than {max_bytes} bytes", "too_large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def fetch_feed_content(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> FetchResult:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    client = get_http_client()
+    started = time.perf_counter()
+    status_code = None
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            status_code = response.status_code
+            redirect_url = permanent_redirect(response)
+            if response.status_code == 304:
+                FETCH_STAGE_SECONDS.labels("download").observe(time.perf_counter() - started)
+                return FetchResult(
+                    status="not_modified",
+                    etag=response.headers.get("ETag", etag),
+                    last_modified=response.headers.get("Last-Modified", last_modified),
+                    content_hash=content_hash,
+                    max_age=parse_cache_max_age(response.headers.get("Cache-Control")),
+                    status_code=status_code,
+                    redirect_url=redirect_url,
+                )
             response.raise_for_status()
-            return feedparser.parse(response.text)
-        except Exception as e:
-            print(f"Error fetching feed {url}: {str(e)}")
-            return None
+            check_content_type(response.headers.get("Content-Type"))
+            body = await read_limited(response, settings.RSS_FETCH_MAX_BYTES)
+    except Exception as e:
+        FETCH_STAGE_SECONDS.labels("download").observe(time.perf_counter() - started)
+        message = error_message(e)
+        print(f"Error fetching feed {url}: {message}")
+        return FetchResult(status="error", error=message, error_kind=error_kind(e), status_code=status_code)
+    downloaded = time.perf_counter()
+    FETCH_STAGE_SECONDS.labels("download").observe(downloaded - started)
 
+    body_hash = hashlib.sha256(body).hexdigest()
+    result = FetchResult(
+        status="ok",
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        content_hash=body_hash,
+        max_age=parse_cache_max_age(response.headers.get("Cache-Control")),
+        bytes_downloaded=len(body),
+        status_code=status_code,
+        redirect_url=redirect_url,
+    )
+    if body_hash == content_hash:
+        result.status = "unchanged"
+        return result
 
-def parse_article_date(date_struct) -> datetime:
-    if date_struct:
-        try:
-            return datetime(*date_struct[:6])
-        except:
-            pass
-    return datetime.utcnow()
+    try:
+        result.feed_data = await parse_feed_async(body, settings.RSS_PARSER_WORKERS)
+    except Exception as e:
+        message = error_message(e)
+        print(f"Error parsing feed {url}: {message}")
+        return FetchResult(
+            status="error", error=f"Parse error: {message}", error_kind="parse",
+            bytes_downloaded=result.bytes_downloaded, status_code=status_code,
+        )
+    finished = time.perf_counter()
+    FETCH_STAGE_SECONDS.labels("parse").observe(finished - downloaded)
+    if settings.SLOW_FETCH_SECONDS and finished - started >= settings.SLOW_FETCH_SECONDS:
+        print(
+            f"Slow feed {url}: {finished - started:.1f}s "
+            f"(download {downloaded - started:.1f}s, parse {finished - downloaded:.1f}s, {len(body)} bytes)"
+        )
+    return result
 
 
-async def fetch_and_store_articles(feed: Feed, db: Session) -> int:
-    feed_data = await fetch_feed_content(feed.url)
-    if not feed_data or not feed_data.entries:
+def store_articles(source: FeedSource, result: FetchResult, db: Session) -> int:
+    now = datetime.utcnow()
+    previous_status = source.fetch_status
+    if source.lease_owner == WORKER_ID:
+        source.lease_owner = None
+        source.lease_expires_at = None
+    if result.status == "skipped":
+        # Not requested, so nothing is known about this feed: only come back when the host may be retried
+        source.next_fetch_at = now + timedelta(seconds=result.retry_after or 0)
+        db.commit()
+        return 0
+    if result.status_code is not None:
+        source.last_status_code = result.status_code
+    if result.status == "error":
+        # Only a new error changes the feed list's ETag; the failure count and retry time
+        # are brought up to date with the next change
+        if result.error != source.last_error:
+            db.execute(bump_versions(source_subscribers(source.id), feeds=True))
+        source.last_error = result.error
+        source.last_error_at = now
+        source.consecutive_failures = (source.consecutive_failures or 0) + 1
+        source.next_fetch_at = now + timedelta(minutes=failure_backoff_minutes(
+            source.fetch_interval_minutes, source.consecutive_failures, gone=result.status_code == 410
+        ))
+        if source.fetch_status != previous_status:
+            publish(db, feed_status_events(db, source.id, source.fetch_status))
+        db.commit()
         return 0
 
-    new_articles_count = 0
-    for entry in feed_data.entries:
-        link = entry.get('link', '')
-        if not link:
-            continue
+    # What the feed list shows besides fetch timestamps, which change on every poll
+    shown = (source.url, source.title, source.last_error, previous_status)
+    source.etag = result.etag
+    source.last_modified = result.last_modified
+    source.content_hash = result.content_hash
+    source.last_fetched = now
+    source.last_error = None
+    source.consecutive_failures = 0
+    if result.redirect_url and result.redirect_url != source.url:
+        move_source(source, result.redirect_url, db)
+    if result.feed_data and result.feed_data.title:
+        source.title = result.feed_data.title
 
-        existing_article = db.query(Article).filter(Article.link == link).first()
-        if existing_article:
-            continue
-
-        article = Article(
-            feed_id=feed.id,
-            title=entry.get('title', 'No Title'),
-            link=link,
-            content=entry.get('summary', entry.get('description', '')),
-            author=entry.get('author', ''),
-            published_at=parse_article_date(entry.get('published_parsed'))
+    entries = result.feed_data.entries if result.feed_data else []
+    rows = _new_article_rows(source, entries, db)
+    if result.feed_data and source.pruned_before:
+        forget_pruned(db, source.id, [entry.link for entry in entries] + [
+            entry.original_link for entry in entries if entry.original_link
+        ])
+    new_articles_count = 0
+    if rows:
+        DUPLICATE_ARTICLES.inc(link_duplicates(db, source.id, rows))
+        stmt = dialect_insert(db, Article.__table__).on_conflict_do_nothing().returning(
+            Article.id, Article.link, Article.simhash, Article.duplicate_of_id
         )
-        db.add(article)
-        new_articles_count += 1
+        inserted = db.execute(stmt, rows).all()
+        new_articles_count = len(inserted)
+        # Index the plain text the parser extracted rather than the (possibly compressed) content
+        texts = {entry.link: entry for entry in entries}
+        index_articles(db, [
+            {"id": row.id, "title": texts[row.link].title, "body": texts[row.link].text}
+            for row in inserted
+        ])
+        index_fingerprints(db, [(row.id, row.simhash) for row in inserted if row.duplicate_of_id is None])
+        add_new_articles(db, source.id, new_articles_count)
+        if new_articles_count:
+            publish(db, new_articles_events(db, source.id, new_articles_count))
+
+    published = [entry.published_at for entry in entries if entry.has_date]
+    source.fetch_interval_minutes = next_fetch_interval(
+        source.fetch_interval_minutes,
+        published,
+        new_articles_count,
+        feed_hint_minutes(result.feed_data.info if result.feed_data else None, result.max_age),
+        now,
+    )
+    source.next_fetch_at = now + timedelta(minutes=source.fetch_interval_minutes)
 
-    feed.last_fetched = datetime.utcnow()
+    changed = shown != (source.url, source.title, source.last_error, source.fetch_status)
+    if changed or new_articles_count:
+        db.execute(bump_versions(
+            source_subscribers(source.id), feeds=changed, counts=bool(new_articles_count),
+            articles=bool(new_articles_count),
+        ))
+    if source.fetch_status != previous_status:
+        publish(db, feed_status_events(db, source.id, source.fetch_status))
     db.commit()
     return new_articles_count
 
 
-async def fetch_all_feeds():
-    db = SessionLocal()
+def move_source(source: FeedSource, url: str, db: Session):
+    """Point a source at the URL it permanently redirected to. If that URL is already another
+    source, this one keeps its URL: merging the two would mean merging their articles."""
+    if db.scalar(select(FeedSource.id).where(FeedSource.url == url)) is not None:
+        print(f"Feed {source.url} moved to {url}, which is already a separate feed; keeping the old URL")
+        return
+    print(f"Feed {source.url} moved permanently to {url}")
+    source.url = url
+
+
+def content_compression_enabled(db: Session) -> bool:
+    # Search reads the index's own copy of the text, so the content column may be compressed
+    return settings.ARTICLE_CONTENT_COMPRESSION and search_reads_index(db)
+
+
+def _new_article_rows(source: FeedSource, entries: List[ParsedEntry], db: Session) -> List[dict]:
+    candidates: Dict[str, dict] = {}
+    compress = content_compression_enabled(db)
+    for entry in entries:
+        if entry.link in candidates:
+            continue
+        # Already pruned by retention (or older than what was)
+        if source.pruned_before and entry.has_date and entry.published_at <= source.pruned_before:
+            continue
+        content, content_zlib = pack_content(entry.content, compress)
+        candidates[entry.link] = {
+            "source_id": source.id,
+            "guid": entry.guid,
+            "title": entry.title,
+            "link": entry.link,
+            "content": content,
+            "content_zlib": content_zlib,
+            "excerpt": entry.excerpt,
+            "reading_time": entry.reading_time,
+            "lead_image": entry.lead_image,
+            "author": entry.author,
+            "published_at": entry.published_at,
+            "url_hash": entry.url_hash,
+            # A GUID that is just the link adds nothing to match on
+            "guid_hash": entry.guid_hash if entry.guid_hash != entry.url_hash else None,
+            "simhash": entry.simhash,
+            "duplicate_of_id": None,
+        }
+    if not candidates:
+        return []
+
+    # One lookup for the whole batch instead of a query per entry
+    guids = [row["guid"] for row in candidates.values() if row["guid"]]
+    # Articles stored before tracking parameters were stripped from links
+    original_links = {entry.original_link: entry.link for entry in entries if entry.original_link}
+    known = Article.link.in_(list(candidates) + list(original_links))
+    if guids:
+        known = or_(known, Article.guid.in_(guids))
+    existing_links = set()
+    existing_guids = set()
+    query = db.query(Article.link, Article.guid).filter(Article.source_id == source.id, known)
+    if source.pruned_before:
+        # Deleted by retention but still in the feed
+        query = query.union_all(db.query(PrunedArticle.link, PrunedArticle.guid).filter(
+            PrunedArticle.source_id == source.id,
+            or_(PrunedArticle.link.in_(list(candidates) + list(original_links)), PrunedArticle.guid.in_(guids)),
+        ))
+    for link, guid in query:
+        existing_links.add(original_links.get(link, link))
+        if guid:
+            existing_guids.add(guid)
+
+    return [
+        row for link, row in candidates.items()
+        if link not in existing_links and row["guid"] not in existing_guids
+    ]
+
+
+async def store_articles_async(source: FeedSource, result: FetchResult, db: AsyncSession) -> int:
+    """Run store_articles on an AsyncSession; its queries go through the async driver"""
+    async with async_write_lock(db):
+        return await db.run_sync(lambda session: store_articles(source, result, session))
+
+
+async def fetch_and_store_articles(source: FeedSource, db: AsyncSession) -> Optional[int]:
+    """Fetch a source now, due or not. Returns None without fetching if another fetch holds its lease."""
+    if not await claim_due_sources(1, [source.id], force=True):
+        return None
+    # The lease was taken in another session; store_articles releases it only if it sees it
+    await db.refresh(source)
+    # Hand the connection back to the pool while waiting on the network
+    await db.commit()
+    result = await get_fetch_engine().fetch(source.url, None, source.etag, source.last_modified, source.content_hash)
+    count = await timed_store(source, result, db)
+    observe_fetch(result.status, result.error_kind, result.bytes_downloaded, count)
+    return count
+
+
+async def timed_store(source: FeedSource, result: FetchResult, db: AsyncSession) -> int:
+    started = time.perf_counter()
     try:
-        feeds = db.query(Feed).all()
-        total_new_articles = 0
-        for feed in feeds:
-            count = await fetch_and_store_articles(feed, db)
-            total_new_articles += count
-            print(f"Fetched {count} new articles from {feed.title}")
-        print(f"Total new articles: {total_new_articles}")
+        return await store_articles_async(source, result, db)
     finally:
-        db.close()
+        FETCH_STAGE_SECONDS.labels("store").observe(time.perf_counter() - started)
+
+
+async def _store_results(queue: asyncio.Queue, db: AsyncSession, stats: FetchCycleStats):
+    # Single writer: the only coroutine touching the session during a cycle
+    while True:
+        item = await queue.get()
+        if item is None:
+            queue.task_done()
+            return
+        source_id, result = item
+        count = 0
+        try:
+            source = await db.get(FeedSource, source_id)
+            if source is None:
+                continue
+            title = source.title or source.url
+            count = await timed_store(source, result, db)
+            if count:
+                print(f"Fetched {count} new articles from {title}")
+        except Exception as e:
+            # Keep draining: fetchers wait on the queue, so a dead writer would stall the cycle
+            result.status = "error"
+            result.error_kind = "store"
+            count = 0
+            print(f"Error storing articles for source {source_id}: {str(e)}")
+            try:
+                await db.rollback()
+            except Exception as rollback_error:
+                print(f"Error rolling back after source {source_id}: {str(rollback_error)}")
+        finally:
+            queue.task_done()
+        stats.record(result)
+        observe_fetch(result.status, result.error_kind, result.bytes_downloaded, count)
+        stats.new_articles += count
+
+
+async def fetch_all_feeds() -> FetchCycleStats:
+    return await _run_fetch_cycle(due_only=False)
+
+
+async def fetch_due_feeds() -> FetchCycleStats:
+    return await _run_fetch_cycle(due_only=True)
+
+
+def _lease_free(now: datetime):
+    return or_(FeedSource.lease_expires_at.is_(None), FeedSource.lease_expires_at <= now)
+
+
+async def next_due_time(db: AsyncSession) -> Optional[datetime]:
+    """When the earliest unclaimed subscribed source becomes due, or None if there are none"""
+    row = (await db.execute(
+        select(FeedSource.next_fetch_at).where(
+            FeedSource.subscriptions.any(), _lease_free(datetime.utcnow())
+        ).order_by(
+            FeedSource.next_fetch_at.is_not(None), FeedSource.next_fetch_at
+        ).limit(1)
+    )).first()
+    if row is None:
+        return None
+    return row.next_fetch_at or datetime.utcnow()
+
+
+async def claim_due_sources(limit: int, source_ids: Optional[List[int]] = None, force: bool = False) -> list:
+    """Lease up to `limit` due sources (of `source_ids`, if given) to this process and return their fetch state.
+    With `force`, sources that are not due yet are claimed too; leased ones never are.
+
+    Workers on any number of hosts can call this concurrently: PostgreSQL skips rows
+    another transaction is claiming (FOR UPDATE SKIP LOCKED) and SQLite runs one writer
+    at a time. A lease that is not released before it expires can be claimed again.
+    """
+    now = datetime.utcnow()
+    due = select(FeedSource.id).where(FeedSource.subscriptions.any(), _lease_free(now)).order_by(
+        FeedSource.next_fetch_at.is_not(None), FeedSource.next_fetch_at
+    ).limit(limit).with_for_update(skip_locked=True)
+    if not force:
+        due = due.where(or_(FeedSource.next_fetch_at.is_(None), FeedSource.next_fetch_at <= now))
+    if source_ids is not None:
+        due = due.where(FeedSource.id.in_(source_ids))
+    stmt = update(FeedSource).where(FeedSource.id.in_(due.scalar_subquery())).values(
+        lease_owner=WORKER_ID,
+        lease_expires_at=now + timedelta(seconds=settings.RSS_FETCH_LEASE_SECONDS),
+    ).returning(
+        FeedSource.id, FeedSource.url, FeedSource.etag, FeedSource.last_modified, FeedSource.content_hash,
+        FeedSource.next_fetch_at,
+    ).execution_options(synchronize_session=False)
+    async with AsyncSessionLocal() as db:
+        async with async_write_lock(db):
+            sources = (await db.execute(stmt)).all()
+            await db.commit()
+    for source in sources:
+        # Never-fetched sources have no due time to be late for, forced ones may not be due yet
+        if source.next_fetch_at is not None and source.next_fetch_at <= now:
+            SCHEDULER_LAG_SECONDS.observe(max((now - source.next_fetch_at).total_seconds(), 0.0))
+    return sources
+
+
+# Fetches started by API requests; referenced so they are not garbage collected while running
+_background_fetches: Set[asyncio.Task] = set()
+
+
+async def fetch_sources(source_ids: List[int]) -> FetchCycleStats:
+    """Fetch these sources now if they are due, e.g. new subscriptions that were never fetched"""
+    return await _run_fetch_cycle(due_only=True, source_ids=source_ids)
+
+
+def fetch_in_background(source_ids: Iterable[int]):
+    """Start fetch_sources without waiting for it. The sources are leased like any due source,
+    so the scheduler or a fetch worker never fetches them at the same time."""
+    source_ids = list(source_ids)
+    if not source_ids:
+        return
+    task = asyncio.create_task(fetch_sources(source_ids))
+    _background_fetches.add(task)
+    task.add_done_callback(_background_fetches.discard)
+
+
+async def stop_background_fetches():
+    """Cancel unfinished background fetches; their leases expire on their own"""
+    for task in list(_background_fetches):
+        task.cancel()
+    await asyncio.gather(*_background_fetches, return_exceptions=True)
+
+
+async def _run_fetch_cycle(due_only: bool, source_ids: Optional[List[int]] = None) -> FetchCycleStats:
+    async with AsyncSessionLocal() as db:
+        stats = FetchCycleStats()
+        engine = get_fetch_engine()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.RSS_FETCH_CONCURRENCY)
+        writer = asyncio.create_task(_store_results(queue, db, stats))
+
+        async def fetch_one(source):
+            result = await engine.fetch(
+                source.url, stats, source.etag, source.last_modified, source.content_hash
+            )
+            await queue.put((source.id, result))
+
+        async def fetch_batch(sources):
+            stats.feeds += len(sources)
+            await asyncio.gather(*(fetch_one(source) for source in sources))
+
+        try:
+            # Each URL is fetched once per cycle no matter how many users subscribe to it
+            if due_only:
+                # Claim in batches so concurrent fetchers share the due sources
+                while sources := await claim_due_sources(settings.RSS_FETCH_BATCH_SIZE, source_ids):
+                    await fetch_batch(sources)
+            else:
+                await fetch_batch((await db.execute(
+                    select(
+                        FeedSource.id, FeedSource.url, FeedSource.etag,
+                        FeedSource.last_modified, FeedSource.content_hash
+                    ).where(FeedSource.subscriptions.any())
+                )).all())
+        finally:
+            await queue.put(None)
+            await writer
+
+        stats.finish()
+        FETCH_CYCLE_SECONDS.observe(stats.wall_time)
+        print(f"Fetch cycle finished: {stats}")
+        return stats
@@ -0,0 +1,159 @@
+import re
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import column, func, inspect, literal_column, or_, table, text
+from sqlalchemy.orm import Query, Session
+from ..models.article import Article
+from .content import unpack_content
+from .text import html_to_text
+
+FTS_TABLE = "articles_fts"
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+# Title matches weigh more than body matches in the SQLite ranking
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+_fts = table(FTS_TABLE, column("rowid"))
+_search_vector = literal_column("articles.search_vector")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_fts_available = {}
+
+
+def fts_available(db: Session) -> bool:
+    """Whether the dialect's full-text index exists (FTS5 may be missing from some SQLite builds)"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _fts_available:
+        if bind.dialect.name == "sqlite":
+            _fts_available[key] = inspect(bind).has_table(FTS_TABLE)
+        elif bind.dialect.name == "postgresql":
+            columns = inspect(bind).get_columns("articles")
+            _fts_available[key] = any(c["name"] == "search_vector" for c in columns)
+        else:
+            _fts_available[key] = False
+    return _fts_available[key]
+
+
+def search_reads_index(db: Session) -> bool:
+    """Whether search matches and snippets come from the SQLite index's own copy of the text.
+    Otherwise (PostgreSQL's generated column, LIKE without an index) they read articles.content."""
+    return db.get_bind().dialect.name == "sqlite" and fts_available(db)
+
+
+def fts5_match_query(search: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: all words must match, the last one as a prefix"""
+    tokens = _TOKEN.findall(search)
+    if not tokens:
+        return None
+    quoted = ['"%s"' % token.replace('"', '""') for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def apply_search(query: Query, db: Session, search: str) -> Tuple[Query, object, object, object]:
+    """Filter `query` to articles matching `search`.
+
+    Returns the filtered query with the ORDER BY expression, and the rank and snippet
+    expressions to select, or None for those two when no full-text index is available.
+    """
+    dialect = db.get_bind().dialect.name
+    if fts_available(db) and dialect == "sqlite":
+        match = fts5_match_query(search)
+        if match is None:
+            return query.filter(text("0 = 1")), Article.id, None, None
+        fts = literal_column(FTS_TABLE)
+        rank = func.bm25(fts, TITLE_WEIGHT, BODY_WEIGHT)
+        snippet = func.snippet(fts, 1, SNIPPET_START, SNIPPET_END, "…", 24)
+        query = query.join(_fts, _fts.c.rowid == Article.id).filter(fts.op("MATCH")(match))
+        # bm25() is lower-is-better
+        return query, rank.asc(), rank, snippet
+
+    if fts_available(db) and dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery("english", search)
+        rank = func.ts_rank_cd(_search_vector, ts_query)
+        snippet = func.ts_headline(
+            "english",
+            func.coalesce(Article.content, Article.title),
+            ts_query,
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxFragments=1, MaxWords=35, MinWords=15",
+        )
+        query = query.filter(_search_vector.op("@@")(ts_query))
+        return query, rank.desc(), rank, snippet
+
+    query = query.filter(
+        or_(
+            Article.title.contains(search),
+            Article.content.contains(search)
+        )
+    )
+    return query, Article.published_at.desc(), None, None
+
+
+def index_articles(db: Session, articles: Iterable[dict]):
+    """Add freshly inserted articles (dicts with id, title and either their plain-text body or
+    HTML content) to the SQLite index.
+
+    PostgreSQL keeps its generated tsvector column in sync by itself.
+    """
+    if db.get_bind().dialect.name != "sqlite" or not fts_available(db):
+        return
+    rows: List[dict] = [
+        {
+            "rowid": a["id"],
+            "title": a.get("title") or "",
+            "body": a["body"] if "body" in a else html_to_text(a.get("content") or ""),
+        }
+        for a in articles
+    ]
+    if rows:
+        db.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:rowid, :title, :body)"), rows)
+
+
+def unindex_articles(db: Session, article_ids):
+    """Remove articles from the SQLite index; `article_ids` may be a list or a subquery"""
+    if db.get_bind().dialect.name != "sqlite" or not fts_available(db):
+        return
+    db.execute(_fts.delete().where(_fts.c.rowid.in_(article_ids)))
+
+
+def rebuild_index(db: Session, batch_size: int = 1000) -> int:
+    """Rebuild the full-text index from the articles table; returns the number of indexed articles"""
+    dialect = db.get_bind().dialect.name
+    _fts_available.clear()
+    if not fts_available(db):
+        return 0
+    if dialect == "postgresql":
+        db.execute(text("REINDEX INDEX ix_articles_search_vector"))
+        db.commit()
+        return db.query(func.count(Article.id)).scalar()
+
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    count = 0
+    last_id = 0
+    while True:
+        batch = db.query(
+            Article.id, Article.title, Article.content, Article.content_zlib, Article.duplicate_of_id
+        ).filter(Article.id > last_id).order_by(Article.id).limit(batch_size).all()
+        if not batch:
+            break
+        # Duplicates keep no content of their own; index their original's
+        originals = {
+            a.id: unpack_content(a.content, a.content_zlib)
+            for a in db.query(Article.id, Article.content, Article.content_zlib).filter(
+                Article.id.in_({a.duplicate_of_id for a in batch if a.duplicate_of_id})
+            )
+        }
+        index_articles(db, [
+            {
+                "id": a.id,
+                "title": a.title,
+                "content": originals.get(a.duplicate_of_id) or unpack_content(a.content, a.content_zlib),
+            }
+            for a in batch
+        ])
+        count += len(batch)
+        last_id = batch[-1].id
+    db.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    db.commit()
+    return count
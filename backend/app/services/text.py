@@ -0,0 +1,78 @@
+import html
+import math
+import re
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+_WHITESPACE = re.compile(r"\s+")
+
+EXCERPT_LENGTH = 280
+WORDS_PER_MINUTE = 220
+
+
+class _TextExtractor(HTMLParser):
+    SKIP_TAGS = {"script", "style", "noscript"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.first_image: Optional[str] = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "img" and self.first_image is None:
+            attrs = dict(attrs)
+            # 1x1 images are tracking pixels
+            if attrs.get("src") and "1" not in (attrs.get("width"), attrs.get("height")):
+                self.first_image = attrs["src"]
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_text_and_image(content: str) -> Tuple[str, Optional[str]]:
+    """Plain text of an HTML fragment with whitespace collapsed, and the src of its first image"""
+    if not content:
+        return "", None
+    parser = _TextExtractor()
+    try:
+        parser.feed(content)
+        parser.close()
+        text = " ".join(parser.parts)
+    except Exception:
+        text = html.unescape(re.sub(r"<[^>]*>", " ", content))
+    return _WHITESPACE.sub(" ", text).strip(), parser.first_image
+
+
+def html_to_text(content: str) -> str:
+    """Plain text of an HTML fragment with whitespace collapsed"""
+    return html_text_and_image(content)[0]
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """The start of `text`, cut at a word boundary"""
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
+def reading_time_minutes(text: str) -> int:
+    words = len(text.split())
+    return math.ceil(words / WORDS_PER_MINUTE) if words else 0
+
+
+def absolute_image_url(src: Optional[str], base_url: str) -> Optional[str]:
+    """`src` resolved against the article link; None unless it is an http(s) URL"""
+    if not src:
+        return None
+    url = urljoin(base_url, src.strip())
+    return url if urlsplit(url).scheme in ("http", "https") else None
@@ -0,0 +1,39 @@
+from typing import Union
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import Session
+from ..models.feed import Feed
+from ..models.user import User
+
+
+def source_subscribers(source_id: int) -> Select:
+    return select(Feed.user_id).where(Feed.source_id == source_id)
+
+
+def bump_versions(
+    users: Union[int, Select, None], feeds: bool = False, articles: bool = False, counts: bool = False
+):
+    """UPDATE statement marking what changed for a user, a subquery of users, or everyone (None).
+
+    feeds_version covers the feed list, counts_version the unread/starred counts and
+    articles_version the article lists; they back the ETags of those endpoints. Counts show
+    in the feed list too, so changing them bumps feeds_version as well.
+    """
+    values = {}
+    if feeds or counts:
+        values["feeds_version"] = User.feeds_version + 1
+    if counts:
+        values["counts_version"] = User.counts_version + 1
+    if articles:
+        values["articles_version"] = User.articles_version + 1
+    stmt = update(User).values(**values).execution_options(synchronize_session=False)
+    if isinstance(users, int):
+        return stmt.where(User.id == users)
+    if users is not None:
+        return stmt.where(User.id.in_(users))
+    return stmt
+
+
+def user_versions(db: Session, user_id: int):
+    return db.execute(
+        select(User.feeds_version, User.articles_version, User.counts_version).where(User.id == user_id)
+    ).one()
@@ -0,0 +1 @@
+"""Benchmarks for the fetch pipeline and the API hot paths; see `python -m benchmarks.run --help`."""
@@ -0,0 +1,42 @@
+"""Compares two benchmark result files scenario by scenario.
+Usage: python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+# Metric per scenario kind and whether lower is better
+METRICS = (("p50_ms", True), ("p95_ms", True), ("wall_time_s", True), ("feeds_per_second", False))
+
+
+def compare(before: dict, after: dict) -> list:
+    rows = []
+    for name, old in before["scenarios"].items():
+        new = after["scenarios"].get(name)
+        if new is None:
+            continue
+        for metric, lower_is_better in METRICS:
+            if metric in old and metric in new and old[metric]:
+                ratio = new[metric] / old[metric]
+                better = ratio < 1 if lower_is_better else ratio > 1
+                rows.append((name, metric, old[metric], new[metric], ratio, better))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    args = parser.parse_args()
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    if before["scale"] != after["scale"]:
+        print(f"⚠️  Comparing different scales: {before['scale']} vs {after['scale']}")
+    print(f"{before['environment']['revision']} -> {after['environment']['revision']}")
+    for name, metric, old, new, ratio, better in compare(before, after):
+        marker = "" if 0.9 <= ratio <= 1.1 else ("  better" if better else "  WORSE")
+        print(f"{name:<28} {metric:<17} {old:>10} -> {new:>10}  x{ratio:.2f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Synthetic feed corpus.
+
+Every entry is derived from (seed, feed, index) alone, so the seeder and the stand-in
+feed server produce the same articles without ever holding the corpus in memory.
+"""
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from typing import List, Optional
+from xml.sax.saxutils import escape
+
+# Fixed so that every run publishes the same dates
+EPOCH = datetime(2024, 1, 1)
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which but have "
+    "an had they you were their one all we can her has there been if more when will would who so no "
+    "network server release update security version support feature performance browser database "
+    "research science climate energy market policy report government election economy company product "
+    "design engineer platform software hardware language model system cloud storage memory kernel "
+    "python rust compiler library framework open source community project developer tutorial guide "
+    "review analysis study data index query cache latency throughput benchmark scale cluster node "
+    "city river mountain garden coffee music film book history travel photo camera street weather"
+).split()
+
+
+@dataclass
+class CorpusConfig:
+    seed: int = 1
+    feeds: int = 100
+    # Entries per feed that are already stored in a seeded database
+    history: int = 100
+    # Entries per feed document
+    window: int = 50
+    # Entries per changed feed that only the server has, i.e. new in the next fetch
+    fresh: int = 2
+    body_bytes: int = 2000
+    # Share of entries that repost another feed's article (same link and content)
+    duplicate_ratio: float = 0.05
+    # Share of feeds whose document still matches the stored ETag, answered with 304
+    unchanged_ratio: float = 0.5
+    # Share of feeds answering with HTTP 500
+    error_ratio: float = 0.0
+    latency_ms: float = 20.0
+    latency_jitter_ms: float = 10.0
+    base_url: str = "http://127.0.0.1:8799"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class CorpusEntry:
+    guid: str
+    title: str
+    link: str
+    content: str
+    author: str
+    published_at: datetime
+
+
+class Corpus:
+    def __init__(self, config: CorpusConfig):
+        self.config = config
+
+    def _rng(self, *key) -> random.Random:
+        # String seeds are hashed deterministically; hash() is salted per process
+        return random.Random(":".join(map(str, (self.config.seed,) + key)))
+
+    def unit(self, *key) -> float:
+        return self._rng(*key).random()
+
+    def feed_url(self, feed: int) -> str:
+        return f"{self.config.base_url}/feeds/{feed}"
+
+    def feed_title(self, feed: int) -> str:
+        return f"Benchmark feed {feed}"
+
+    def interval_minutes(self, feed: int) -> int:
+        """How often the feed publishes"""
+        return self._rng(feed, "interval").choice((15, 30, 60, 180, 720, 1440))
+
+    def is_unchanged(self, feed: int) -> bool:
+        return self.unit(feed, "unchanged") < self.config.unchanged_ratio
+
+    def fails(self, feed: int) -> bool:
+        return self.unit(feed, "error") < self.config.error_ratio
+
+    def latency_seconds(self, feed: int) -> float:
+        jitter = self.config.latency_jitter_ms * self.unit(feed, "latency")
+        return (self.config.latency_ms + jitter) / 1000
+
+    def served_count(self, feed: int) -> int:
+        """Number of entries the feed has published as far as the server is concerned"""
+        if self.is_unchanged(feed):
+            return self.config.history
+        return self.config.history + self.config.fresh
+
+    def etag(self, feed: int, count: int) -> str:
+        return f'"{self.config.seed}-{feed}-{count}"'
+
+    def stored_etag(self, feed: int) -> str:
+        return self.etag(feed, self.config.history)
+
+    def served_etag(self, feed: int) -> str:
+        return self.etag(feed, self.served_count(feed))
+
+    def _body(self, rng: random.Random, feed: int, index: int) -> str:
+        parts = []
+        if rng.random() < 0.5:
+            parts.append(f'<figure><img src="/images/{feed}/{index}.jpg" width="800"></figure>')
+        size = sum(len(part) for part in parts)
+        while size < self.config.body_bytes:
+            words = rng.choices(WORDS, k=rng.randint(40, 90))
+            words[rng.randrange(len(words))] = f'<a href="https://example.org/{rng.randrange(10**6)}">{words[0]}</a>'
+            paragraph = "<p>" + " ".join(words).capitalize() + ".</p>"
+            parts.append(paragraph)
+            size += len(paragraph)
+        return "".join(parts)
+
+    def _original(self, feed: int, index: int) -> CorpusEntry:
+        rng = self._rng(feed, index)
+        title = " ".join(rng.choices(WORDS, k=rng.randint(4, 10))).capitalize()
+        return CorpusEntry(
+            guid=f"urn:bench:{self.config.seed}:{feed}:{index}",
+            title=title,
+            link=f"https://feed{feed}.example.com/posts/{index}",
+            content=self._body(rng, feed, index),
+            author=f"Author {rng.randrange(50)}",
+            published_at=EPOCH + timedelta(minutes=self.interval_minutes(feed) * index),
+        )
+
+    def entry(self, feed: int, index: int) -> CorpusEntry:
+        entry = self._original(feed, index)
+        rng = self._rng(feed, index, "duplicate")
+        if self.config.feeds > 1 and rng.random() < self.config.duplicate_ratio:
+            other = (feed + 1 + rng.randrange(self.config.feeds - 1)) % self.config.feeds
+            original = self._original(other, rng.randrange(self.config.history))
+            entry.title, entry.link, entry.content = original.title, original.link, original.content
+        return entry
+
+    def entries(self, feed: int, start: int, stop: int) -> List[CorpusEntry]:
+        return [self.entry(feed, index) for index in range(start, stop)]
+
+    def document(self, feed: int, count: Optional[int] = None) -> bytes:
+        """RSS 2.0 document with the latest `window` of the first `count` entries, newest first"""
+        count = self.served_count(feed) if count is None else count
+        start = max(0, count - self.config.window)
+        items = []
+        for entry in reversed(self.entries(feed, start, count)):
+            items.append(
+                "<item>"
+                f"<title>{escape(entry.title)}</title>"
+                f"<link>{escape(entry.link)}</link>"
+                f'<guid isPermaLink="false">{escape(entry.guid)}</guid>'
+                f"<author>{escape(entry.author)}</author>"
+                f"<pubDate>{format_datetime(entry.published_at.replace(tzinfo=None), usegmt=False)}</pubDate>"
+                f"<description>{escape(entry.content)}</description>"
+                "</item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<rss version="2.0"><channel>'
+            f"<title>{escape(self.feed_title(feed))}</title>"
+            f"<link>{escape(self.feed_url(feed))}</link>"
+            f"<description>Synthetic feed {feed}</description>"
+            f"{''.join(items)}"
+            "</channel></rss>"
+        ).encode("utf-8")
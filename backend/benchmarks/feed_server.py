@@ -0,0 +1,99 @@
+"""Local stand-in for feed publishers.
+
+Serves a Corpus at /feeds/<n> with ETags (If-None-Match is answered with 304), a fixed
+per-feed latency and injected HTTP 500s. It runs in its own process so that rendering
+documents does not compete with the fetcher for the GIL.
+Usage: python -m benchmarks.feed_server --corpus seed-10k.json [--port 8799]
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .corpus import Corpus, CorpusConfig
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def make_handler(corpus: Corpus):
+    @lru_cache(maxsize=2048)
+    def document(feed: int) -> bytes:
+        return corpus.document(feed)
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "feeds" or not parts[1].isdigit():
+                return self._respond(404)
+            feed = int(parts[1])
+            if feed >= corpus.config.feeds:
+                return self._respond(404)
+            time.sleep(corpus.latency_seconds(feed))
+            if corpus.fails(feed):
+                return self._respond(500)
+            etag = corpus.served_etag(feed)
+            if self.headers.get("If-None-Match") == etag:
+                return self._respond(304, headers={"ETag": etag})
+            self._respond(200, document(feed), {"ETag": etag, "Content-Type": "application/rss+xml"})
+
+        def _respond(self, status: int, body: bytes = b"", headers: dict = None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return FeedHandler
+
+
+def serve(corpus: Corpus, port: int):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(corpus))
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    server.serve_forever()
+
+
+def start_server(corpus_file: Path, timeout: float = 30.0) -> subprocess.Popen:
+    """Run the server for a seeded corpus in a subprocess and wait until it accepts connections"""
+    config = CorpusConfig(**json.loads(corpus_file.read_text())["corpus"])
+    port = urlsplit(config.base_url).port
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.feed_server", "--corpus", str(corpus_file), "--port", str(port)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Feed server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", required=True, type=Path, help="metadata file written by benchmarks.seed")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    config = CorpusConfig(**json.loads(args.corpus.read_text())["corpus"])
+    serve(Corpus(config), args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Runs benchmark scenarios against a seeded database and writes the results as JSON.
+
+Seeded SQLite databases are kept in benchmarks/data and copied before every run, so
+runs start from identical data. Another database (e.g. PostgreSQL) can be given with
+--database; it is used in place and must have been seeded with benchmarks.seed.
+Usage: python -m benchmarks.run --scale 10k [--scenarios fetch,list,bulk] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .seed import SCALES
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+
+def seeded_template(scale: str, reseed: bool, port: int) -> Path:
+    database = DATA_DIR / f"seed-{scale}.db"
+    metadata = database.with_suffix(".json")
+    if reseed or not (database.exists() and metadata.exists()):
+        DATA_DIR.mkdir(exist_ok=True)
+        for path in (database, metadata, Path(f"{database}-wal"), Path(f"{database}-shm")):
+            path.unlink(missing_ok=True)
+        subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.seed", "--scale", scale, "--port", str(port),
+                "--database", f"sqlite:///{database}", "--metadata", str(metadata),
+            ],
+            cwd=BACKEND_DIR,
+            check=True,
+        )
+    return metadata
+
+
+def working_copy(template: Path) -> Path:
+    work = template.with_name(template.name.replace("seed-", "work-"))
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{work}{suffix}").unlink(missing_ok=True)
+    shutil.copyfile(template, work)
+    return work
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return revision
+
+
+def environment() -> dict:
+    import sqlite3
+    import sqlalchemy
+    from app.core.config import settings
+    from app.core.database import engine
+
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "database": engine.dialect.name,
+        "settings": {
+            name: getattr(settings, name)
+            for name in (
+                "RSS_FETCH_CONCURRENCY", "RSS_FETCH_PER_HOST_CONCURRENCY", "RSS_FETCH_HTTP2",
+                "RSS_PARSER_WORKERS", "ARTICLE_CONTENT_COMPRESSION", "SQLITE_POOL_SIZE",
+                "SQLITE_CACHE_SIZE_MB", "SQLITE_MMAP_SIZE_MB",
+            )
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--scenarios", default="fetch,list,bulk", help="comma-separated: fetch, list, bulk")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per latency scenario")
+    parser.add_argument("--output", type=Path, help="write the JSON here instead of stdout")
+    parser.add_argument("--reseed", action="store_true", help="rebuild the seeded SQLite database")
+    parser.add_argument("--database", help="use this seeded database in place instead of a SQLite copy")
+    parser.add_argument("--metadata", type=Path, help="seed metadata for --database (written by benchmarks.seed)")
+    parser.add_argument("--port", type=int, default=8799, help="feed server port used when seeding")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    if args.database:
+        if not args.metadata:
+            parser.error("--database needs --metadata")
+        metadata_file, database_url = args.metadata, args.database
+    else:
+        metadata_file = seeded_template(args.scale, args.reseed, args.port)
+        database_url = f"sqlite:///{working_copy(metadata_file.with_suffix('.db'))}"
+    metadata = json.loads(metadata_file.read_text())
+
+    # Settings are read when the app is first imported
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["RSS_SCHEDULER_ENABLED"] = "false"
+    # Every stand-in feed lives on one host; don't let the per-host limit serialize the cycle
+    os.environ.setdefault("RSS_FETCH_PER_HOST_CONCURRENCY", os.environ.get("RSS_FETCH_CONCURRENCY", "20"))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from .feed_server import start_server
+    from .scenarios import SCENARIOS, Bench
+
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "scale": metadata["scale"],
+        "seed": {key: metadata[key] for key in ("corpus", "articles", "user_articles")},
+        "environment": environment(),
+        "scenarios": {},
+    }
+    server = start_server(metadata_file) if "fetch" in names else None
+    started = time.perf_counter()
+    try:
+        with TestClient(app) as client:
+            bench = Bench(client, metadata["users"], metadata["password"], repeat=args.repeat)
+            for name in names:
+                print(f"Running {name} scenarios", file=sys.stderr)
+                report["scenarios"].update(SCENARIOS[name](bench))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    report["wall_time_s"] = round(time.perf_counter() - started, 1)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
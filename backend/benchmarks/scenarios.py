@@ -0,0 +1,179 @@
+"""Timed scenarios against a seeded database.
+
+Imports the app, so DATABASE_URL must point at the benchmark database before this
+module is imported (benchmarks.run takes care of that).
+"""
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from fastapi.testclient import TestClient
+
+from app.services.rss_fetcher import fetch_all_feeds
+
+SEARCHES = {"common": "performance", "phrase": "open source release", "prefix": "bench"}
+CURSOR_PAGES = 20
+
+
+def summarize(samples: List[float]) -> dict:
+    """Latency summary of samples in seconds"""
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        "runs": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def measure(request: Callable[[int], object], repeat: int, warmup: int = 1) -> dict:
+    """Time `request(i)` for i in range(repeat) after `warmup` untimed calls"""
+    for i in range(warmup):
+        request(-1 - i)
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        request(i)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+@dataclass
+class Bench:
+    client: TestClient
+    users: List[str]
+    password: str
+    repeat: int = 20
+    headers: Dict[str, dict] = field(default_factory=dict)
+
+    def auth(self, username: str) -> dict:
+        if username not in self.headers:
+            response = self.client.post("/api/auth/login", data={"username": username, "password": self.password})
+            response.raise_for_status()
+            self.headers[username] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return self.headers[username]
+
+    def get(self, path: str, user: str, expect: int = 200, headers: dict = None, **params):
+        response = self.client.get(path, params=params, headers={**self.auth(user), **(headers or {})})
+        if response.status_code != expect:
+            raise RuntimeError(f"GET {path} {params}: {response.status_code} {response.text[:200]}")
+        return response
+
+    def post(self, path: str, user: str, json: dict):
+        response = self.client.post(path, json=json, headers=self.auth(user))
+        if response.status_code != 200:
+            raise RuntimeError(f"POST {path} {json}: {response.status_code} {response.text[:200]}")
+        return response
+
+
+def fetch_scenarios(bench: Bench) -> dict:
+    """Two full fetch cycles: the first meets changed and unchanged feeds, the second only 304s"""
+    results = {}
+    for name in ("fetch.cycle", "fetch.cycle_repeat"):
+        stats = bench.client.portal.call(fetch_all_feeds)
+        results[name] = {
+            "wall_time_s": round(stats.wall_time, 3),
+            "feeds": stats.feeds,
+            "feeds_per_second": round(stats.feeds_per_second, 1),
+            "succeeded": stats.succeeded,
+            "failed": stats.failed,
+            "skipped": stats.skipped,
+            "not_modified": stats.not_modified,
+            "unchanged": stats.unchanged,
+            "new_articles": stats.new_articles,
+            "bytes_downloaded": stats.bytes_downloaded,
+            "in_flight_peak": stats.in_flight_peak,
+        }
+    return results
+
+
+def list_scenarios(bench: Bench) -> dict:
+    user = bench.users[0]
+    repeat = bench.repeat
+    feeds = bench.get("/api/feeds/", user).json()
+    first_page = bench.get("/api/articles/", user, limit=50).json()
+    results = {
+        "feeds.list": measure(lambda i: bench.get("/api/feeds/", user), repeat),
+        "feeds.counts": measure(lambda i: bench.get("/api/feeds/counts", user), repeat),
+        "articles.first_page": measure(lambda i: bench.get("/api/articles/", user, limit=50), repeat),
+        "articles.unread": measure(lambda i: bench.get("/api/articles/", user, limit=50, is_read=False), repeat),
+        "articles.starred": measure(lambda i: bench.get("/api/articles/", user, limit=50, is_starred=True), repeat),
+        "articles.feed": measure(
+            lambda i: bench.get("/api/articles/", user, limit=50, feed_id=feeds[i % len(feeds)]["id"]), repeat
+        ),
+        "articles.offset_deep": measure(lambda i: bench.get("/api/articles/", user, limit=50, skip=5000), repeat),
+        "article.detail": measure(
+            lambda i: bench.get(f"/api/articles/{first_page[i % len(first_page)]['id']}", user), repeat
+        ),
+    }
+
+    etag = bench.get("/api/articles/", user, limit=50).headers.get("ETag")
+    if etag:
+        results["articles.not_modified"] = measure(
+            lambda i: bench.get("/api/articles/", user, expect=304, headers={"If-None-Match": etag}, limit=50),
+            repeat,
+        )
+
+    # Keyset pagination: latency of each page while walking CURSOR_PAGES deep
+    samples = []
+    for _ in range(max(1, repeat // 5)):
+        cursor = None
+        for _ in range(CURSOR_PAGES):
+            started = time.perf_counter()
+            response = bench.get("/api/articles/", user, limit=50, **({"cursor": cursor} if cursor else {}))
+            samples.append(time.perf_counter() - started)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+    results["articles.cursor_pages"] = summarize(samples)
+
+    for name, query in SEARCHES.items():
+        results[f"articles.search_{name}"] = measure(
+            lambda i, query=query: bench.get("/api/articles/", user, limit=50, search=query), repeat
+        )
+    return results
+
+
+def bulk_scenarios(bench: Bench) -> dict:
+    """State changes; every call flips state so that each one writes"""
+    user = bench.users[0]
+    repeat = bench.repeat
+    articles = bench.get("/api/articles/", user, limit=max(repeat, 50)).json()
+    feeds = bench.get("/api/feeds/", user).json()
+    categories = sorted({feed["category"] for feed in feeds if feed["category"]})
+
+    def flip(i: int) -> bool:
+        return i % 2 == 0
+
+    return {
+        "mark.read": measure(
+            lambda i: bench.post(f"/api/articles/{articles[i % len(articles)]['id']}/read", user, {"is_read": flip(i // len(articles))}),
+            repeat, warmup=0,
+        ),
+        "mark.star": measure(
+            lambda i: bench.post(f"/api/articles/{articles[i % len(articles)]['id']}/star", user, {"is_starred": flip(i // len(articles) + 1)}),
+            repeat, warmup=0,
+        ),
+        "bulk.feed": measure(
+            lambda i: bench.post("/api/articles/mark", user, {"feed_id": feeds[0]["id"], "is_read": flip(i)}),
+            repeat, warmup=0,
+        ),
+        "bulk.category": measure(
+            lambda i: bench.post("/api/articles/mark", user, {"category": categories[0], "is_read": flip(i)}),
+            max(2, repeat // 5), warmup=0,
+        ),
+        "bulk.everything": measure(
+            lambda i: bench.post("/api/articles/mark", user, {"older_than": "2100-01-01T00:00:00", "is_read": flip(i)}),
+            2, warmup=0,
+        ),
+    }
+
+
+SCENARIOS = {
+    "fetch": fetch_scenarios,
+    "list": list_scenarios,
+    "bulk": bulk_scenarios,
+}
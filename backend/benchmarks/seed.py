@@ -0,0 +1,213 @@
+"""Builds a benchmark database: users, subscriptions, articles and read/starred state.
+
+Articles are the first `history` entries of every corpus feed, stored the way ingest
+stores them (excerpts, compressed content, search index), so the fetch scenario finds
+the database in the state a running reader would leave it.
+Usage: python -m benchmarks.seed --scale 10k --database sqlite:///benchmarks/data/seed-10k.db
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .corpus import Corpus, CorpusConfig
+
+SCALES = {
+    "10k": dict(feeds=100, history=100, body_bytes=2000),
+    "1m": dict(feeds=2000, history=500, body_bytes=1000),
+    "10m": dict(feeds=10000, history=1000, body_bytes=500),
+}
+
+USERS = 5
+# User 0 subscribes to every feed, the others to this share of them
+SUBSCRIBE_RATIO = 0.5
+READ_PERCENT = 60
+STARRED_PERMILLE = 10
+CATEGORIES = 10
+BATCH_SIZE = 5000
+PASSWORD = "benchmark"
+
+
+def corpus_config(scale: str, **overrides) -> CorpusConfig:
+    return CorpusConfig(**{**SCALES[scale], **{k: v for k, v in overrides.items() if v is not None}})
+
+
+def _insert_articles(db, corpus: Corpus, source_ids: dict, batch_size: int) -> int:
+    from app.core.database import dialect_insert
+    from app.models.article import Article
+    from app.services.rss_fetcher import content_compression_enabled
+    from app.services.content import pack_content
+    from app.services.search import index_articles
+    from app.services.text import absolute_image_url, html_text_and_image, make_excerpt, reading_time_minutes
+
+    compress = content_compression_enabled(db)
+    fetched_at = datetime.utcnow()
+    stmt = dialect_insert(db, Article.__table__).on_conflict_do_nothing().returning(
+        Article.id, Article.source_id, Article.link
+    )
+    total = 0
+    rows, texts = [], {}
+
+    def flush():
+        nonlocal total, rows, texts
+        inserted = db.execute(stmt, rows).all()
+        index_articles(db, [
+            {"id": article_id, "title": texts[source_id, link][0], "body": texts[source_id, link][1]}
+            for article_id, source_id, link in inserted
+        ])
+        db.commit()
+        total += len(inserted)
+        rows, texts = [], {}
+        print(f"  {total} articles")
+
+    for feed, source_id in source_ids.items():
+        for entry in corpus.entries(feed, 0, corpus.config.history):
+            text, image = html_text_and_image(entry.content)
+            content, content_zlib = pack_content(entry.content, compress)
+            rows.append({
+                "source_id": source_id,
+                "guid": entry.guid,
+                "title": entry.title,
+                "link": entry.link,
+                "content": content,
+                "content_zlib": content_zlib,
+                "excerpt": make_excerpt(text),
+                "reading_time": reading_time_minutes(text),
+                "lead_image": absolute_image_url(image, entry.link),
+                "author": entry.author,
+                "published_at": entry.published_at,
+                "fetched_at": fetched_at,
+            })
+            texts[source_id, entry.link] = (entry.title, text)
+            if len(rows) >= batch_size:
+                flush()
+    if rows:
+        flush()
+    return total
+
+
+def seed_database(config: CorpusConfig, users: int = USERS, batch_size: int = BATCH_SIZE) -> dict:
+    """Fill the (empty) database at DATABASE_URL; returns what was created"""
+    from sqlalchemy import func, insert, text
+    from app.core.database import SessionLocal, engine
+    from app.core.migrations import run_migrations
+    from app.core.security import get_password_hash
+    from app.models.article import Article, UserArticle
+    from app.models.feed import Feed, FeedSource
+    from app.models.user import User
+    from app.services.counters import reconcile_counters
+
+    started = time.perf_counter()
+    corpus = Corpus(config)
+    run_migrations()
+    db = SessionLocal()
+    try:
+        if db.query(Article.id).first() is not None:
+            raise RuntimeError("The benchmark database must be empty")
+        now = datetime.utcnow()
+        password = get_password_hash(PASSWORD)
+        user_ids = [
+            db.execute(insert(User).values(
+                username=f"bench{user}", email=f"bench{user}@example.com", hashed_password=password
+            ).returning(User.id)).scalar_one()
+            for user in range(users)
+        ]
+
+        source_ids = {}
+        for feed in range(config.feeds):
+            interval = corpus.interval_minutes(feed)
+            source_ids[feed] = db.execute(insert(FeedSource).values(
+                url=corpus.feed_url(feed),
+                title=corpus.feed_title(feed),
+                etag=corpus.stored_etag(feed),
+                last_fetched=now,
+                fetch_interval_minutes=interval,
+                next_fetch_at=now + timedelta(minutes=interval),
+            ).returning(FeedSource.id)).scalar_one()
+        db.execute(insert(Feed), [
+            {
+                "user_id": user_id,
+                "source_id": source_id,
+                "title": corpus.feed_title(feed),
+                "category": f"Category {feed % CATEGORIES}",
+            }
+            for user, user_id in enumerate(user_ids)
+            for feed, source_id in source_ids.items()
+            if user == 0 or corpus.unit(user, feed, "subscribe") < SUBSCRIBE_RATIO
+        ])
+        db.commit()
+        print(f"Seeding {config.feeds} feeds x {config.history} articles for {users} users")
+
+        articles = _insert_articles(db, corpus, source_ids, batch_size)
+
+        # Deterministic spread of read/starred state, generated inside the database
+        read = text(f"(articles.id + feeds.user_id * 7) % 100 < {READ_PERCENT}")
+        starred = text(f"(articles.id * 31 + feeds.user_id) % 1000 < {STARRED_PERMILLE}")
+        db.execute(text(
+            "INSERT INTO user_articles (user_id, article_id, is_read, is_starred) "
+            f"SELECT feeds.user_id, articles.id, {read}, {starred} "
+            "FROM articles JOIN feeds ON feeds.source_id = articles.source_id "
+            f"WHERE {read} OR {starred}"
+        ))
+        db.commit()
+        user_articles = db.query(func.count()).select_from(UserArticle).scalar()
+        reconcile_counters(db)
+        db.execute(text("ANALYZE"))
+        db.commit()
+    finally:
+        db.close()
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    engine.dispose()
+
+    return {
+        "corpus": config.to_dict(),
+        "users": [f"bench{user}" for user in range(users)],
+        "password": PASSWORD,
+        "articles": articles,
+        "user_articles": user_articles,
+        "seed_seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--database", required=True, help="SQLAlchemy URL of an empty database")
+    parser.add_argument("--metadata", type=Path, help="where to write the corpus/seed description (JSON)")
+    parser.add_argument("--users", type=int, default=USERS)
+    parser.add_argument("--feeds", type=int)
+    parser.add_argument("--history", type=int)
+    parser.add_argument("--body-bytes", type=int)
+    parser.add_argument("--duplicate-ratio", type=float)
+    parser.add_argument("--unchanged-ratio", type=float)
+    parser.add_argument("--error-ratio", type=float)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    # Settings are read when the app is first imported
+    os.environ["DATABASE_URL"] = args.database
+    os.environ["RSS_SCHEDULER_ENABLED"] = "false"
+    config = corpus_config(
+        args.scale,
+        feeds=args.feeds,
+        history=args.history,
+        body_bytes=args.body_bytes,
+        duplicate_ratio=args.duplicate_ratio,
+        unchanged_ratio=args.unchanged_ratio,
+        error_ratio=args.error_ratio,
+        latency_ms=args.latency_ms,
+        base_url=f"http://127.0.0.1:{args.port}",
+    )
+    metadata = {"scale": args.scale, "database": args.database, **seed_database(config, args.users)}
+    if args.metadata:
+        args.metadata.write_text(json.dumps(metadata, indent=2))
+    print(json.dumps({k: v for k, v in metadata.items() if k != "corpus"}))
+
+
+if __name__ == "__main__":
+    main()
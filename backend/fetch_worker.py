@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Standalone RSS fetcher. Run any number of these, on any number of hosts, and set
+RSS_SCHEDULER_ENABLED=false for the API processes. Workers lease due feeds from the
+database, so every feed is fetched by one worker at a time. Counter reconciliation and
+retention are left to the API processes.
+Set METRICS_PORT to serve Prometheus metrics for the worker on that port.
+Usage: python fetch_worker.py
+"""
+
+import asyncio
+import signal
+
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.core.migrations import run_migrations
+from app.core.scheduler import start_scheduler, stop_scheduler
+from app.services.feed_parser import shutdown_parser_pool
+from app.services.rss_fetcher import WORKER_ID, close_http_client
+
+
+async def run_worker():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if settings.METRICS_PORT:
+        start_http_server(settings.METRICS_PORT)
+    # Counter reconciliation and retention run in the API processes, not once per worker
+    start_scheduler(maintenance=False)
+    print(f"✅ Fetch worker {WORKER_ID} running, press Ctrl+C to stop")
+    try:
+        await stop.wait()
+    finally:
+        stop_scheduler()
+        await close_http_client()
+        shutdown_parser_pool()
+        print(f"👋 Fetch worker {WORKER_ID} stopped; its unfinished leases expire on their own")
+
+
+if __name__ == "__main__":
+    run_migrations()
+    asyncio.run(run_worker())
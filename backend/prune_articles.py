@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Script to delete articles past their retention (RETENTION_* settings and per-feed limits).
+Starred articles are always kept.
+Usage: python prune_articles.py [--dry-run] [--vacuum]
+  --dry-run  only print how many articles each feed would lose
+  --vacuum   afterwards rewrite the SQLite file with a full VACUUM, which also switches
+             existing databases to incremental vacuuming (blocks writers while it runs)
+"""
+
+import sys
+
+from app.core.database import SessionLocal, engine
+from app.core.migrations import run_migrations
+from app.models.feed import FeedSource
+from app.services.retention import compact_database, prune_articles
+
+
+def prune(dry_run: bool, vacuum: bool):
+    run_migrations()
+    db = SessionLocal()
+    try:
+        results = prune_articles(db, dry_run=dry_run)
+        urls = dict(db.query(FeedSource.id, FeedSource.url).filter(FeedSource.id.in_(list(results))))
+        for source_id, count in sorted(results.items(), key=lambda item: -item[1]):
+            print(f"  {count:>8}  {urls.get(source_id, source_id)}")
+        verb = "Would delete" if dry_run else "Deleted"
+        print(f"✅ {verb} {sum(results.values())} articles from {len(results)} feeds")
+    except Exception as e:
+        print(f"❌ Error pruning articles: {e}")
+        db.rollback()
+        return
+    finally:
+        db.close()
+
+    if dry_run:
+        return
+    if vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        print("✅ Database vacuumed")
+        # Pooled connections still report the old auto_vacuum mode
+        engine.dispose()
+    compact_database()
+
+
+if __name__ == "__main__":
+    prune(dry_run="--dry-run" in sys.argv, vacuum="--vacuum" in sys.argv)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the article full-text search index.
+Usage: python rebuild_search_index.py
+"""
+
+from app.core.database import SessionLocal
+from app.core.migrations import run_migrations
+from app.services.search import rebuild_index
+
+
+def rebuild_search_index():
+    run_migrations()
+    db = SessionLocal()
+    try:
+        count = rebuild_index(db)
+        if count:
+            print(f"✅ Search index rebuilt for {count} articles")
+        else:
+            print("⚠️  No full-text index available (is FTS5 compiled into SQLite?) or no articles")
+    except Exception as e:
+        print(f"❌ Error rebuilding search index: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
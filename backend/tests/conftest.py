@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+# Settings and engines are created on import, so the database is chosen before anything imports app
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("RSS_SCHEDULER_ENABLED", "false")
+
+import pytest  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.migrations import run_migrations  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    run_migrations()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
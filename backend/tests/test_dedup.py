@@ -0,0 +1,54 @@
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from app.models.article import Article
+from app.models.feed import FeedSource
+from app.services.feed_parser import parse_feed
+from app.services.rss_fetcher import FetchResult, store_articles
+
+
+def feed(*entries):
+    published = format_datetime(datetime.now(timezone.utc))
+    items = "".join(
+        f"<item><title>{title}</title><link>{link}</link><pubDate>{published}</pubDate>"
+        f"<description>{escape(content)}</description></item>"
+        for title, link, content in entries
+    )
+    rss = f"<rss version='2.0'><channel><title>Syndicated</title>{items}</channel></rss>"
+    return FetchResult(status="ok", feed_data=parse_feed(rss.encode()))
+
+
+def stored(db, link, source):
+    return db.query(Article).filter(Article.link == link, Article.source_id == source.id).one()
+
+
+def test_duplicates_drop_only_content_that_repeats_the_original(db):
+    first, second = FeedSource(url="http://example.com/wire.xml"), FeedSource(url="http://example.com/paper.xml")
+    db.add_all([first, second])
+    db.commit()
+    storm = (
+        "<p>A storm is expected to reach the coast tonight, bringing heavy rain and strong winds to most of "
+        "the region. Forecasters warned that rivers in the northern valleys could rise quickly and asked "
+        "residents near the water to prepare sandbags, charge their phones and stay indoors until the worst "
+        "has passed{}</p>"
+    )
+    story = "<p>The council approved the new bridge on Tuesday after a long debate about its cost.</p>"
+    store_articles(first, feed(
+        ("Bridge approved", "http://example.com/bridge", story),
+        ("Budget passed", "http://example.com/budget", "<p>The budget passed with a narrow majority.</p>"),
+        ("Storm warning", "http://example.com/storm", storm.format(".")),
+    ), db)
+
+    store_articles(second, feed(
+        ("Bridge approved", "http://example.com/bridge", story.replace("</p>", "</p>\n\n")),
+        ("Budget passed", "http://example.com/budget", "<p>The budget passed. Our analysis follows.</p>"),
+        ("Storm warning", "http://example.com/storm-warning", storm.format(" on Wednesday.")),
+    ), db)
+
+    same = stored(db, "http://example.com/bridge", second)
+    assert same.duplicate_of_id is not None and same.content is None
+    rewritten = stored(db, "http://example.com/budget", second)
+    assert rewritten.duplicate_of_id is not None and "Our analysis" in rewritten.content
+    similar = stored(db, "http://example.com/storm-warning", second)
+    assert similar.duplicate_of_id is not None and similar.content.endswith("on Wednesday.</p>")
@@ -0,0 +1,27 @@
+import asyncio
+
+from app.api.endpoints.events import event_stream
+from app.services.events import broadcaster
+
+
+class ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def test_open_streams_end_when_the_server_shuts_down():
+    async def run():
+        broadcaster.open()
+        stream = event_stream(ConnectedRequest(), "token", user_id=1, last_event_id=None)
+        assert await stream.__anext__() == "retry: 5000\n\n"
+        waiting = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        broadcaster.close()
+        try:
+            await asyncio.wait_for(waiting, 1)
+        except StopAsyncIteration:
+            return True
+        return False
+
+    assert asyncio.run(run())
+    assert not broadcaster.has_subscribers
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from app.models.article import Article, PrunedArticle
+from app.models.feed import Feed, FeedSource
+from app.models.user import User
+from app.services.feed_parser import ParsedEntry, ParsedFeed
+from app.services.retention import prune_articles
+from app.services.rss_fetcher import FetchResult, store_articles
+
+
+def undated_feed(links):
+    return FetchResult(status="ok", feed_data=ParsedFeed(title="Undated", entries=[
+        ParsedEntry(
+            guid=None, title=link, link=link, content="", author="",
+            published_at=datetime.utcnow(), has_date=False,
+        )
+        for link in links
+    ]))
+
+
+def subscribe(db, name, keep_max_articles):
+    user = User(username=name, email=f"{name}@example.com", hashed_password="x")
+    source = FeedSource(url=f"http://example.com/{name}.xml")
+    db.add_all([user, source])
+    db.flush()
+    feed = Feed(user_id=user.id, source_id=source.id, title=name, keep_max_articles=keep_max_articles)
+    db.add(feed)
+    db.commit()
+    return source, feed
+
+
+def test_pruned_undated_entries_are_not_fetched_again(db):
+    source, feed = subscribe(db, "undated", keep_max_articles=2)
+    links = [f"http://example.com/undated/{i}" for i in range(5)]
+
+    assert store_articles(source, undated_feed(links), db) == 5
+    assert prune_articles(db, source_ids=[source.id]) == {source.id: 3}
+    for _ in range(3):
+        db.refresh(source)
+        assert store_articles(source, undated_feed(links), db) == 0
+        assert prune_articles(db, source_ids=[source.id]) == {}
+
+    db.refresh(feed)
+    assert feed.unread_count == 2
+    assert db.query(Article).filter(Article.source_id == source.id).count() == 2
+
+
+def test_pruned_links_are_forgotten_once_they_leave_the_feed(db):
+    source, _ = subscribe(db, "rotating", keep_max_articles=2)
+    links = [f"http://example.com/rotating/{i}" for i in range(5)]
+    store_articles(source, undated_feed(links), db)
+    prune_articles(db, source_ids=[source.id])
+    pruned = db.query(PrunedArticle.link).filter(PrunedArticle.source_id == source.id)
+    assert pruned.count() == 3
+
+    db.refresh(source)
+    store_articles(source, undated_feed(links[2:]), db)
+    # The three oldest were pruned; only the one still in the feed is remembered
+    assert [link for link, in pruned] == [links[2]]
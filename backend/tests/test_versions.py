@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from app.models.feed import Feed, FeedSource
+from app.models.user import User
+from app.services.feed_parser import ParsedEntry, ParsedFeed
+from app.services.rss_fetcher import FetchResult, store_articles
+from app.services.versions import user_versions
+
+
+def one_entry_feed(link):
+    return FetchResult(status="ok", feed_data=ParsedFeed(title="Polled", entries=[
+        ParsedEntry(
+            guid=link, title=link, link=link, content="", author="",
+            published_at=datetime.utcnow(), has_date=True,
+        )
+    ]))
+
+
+def test_polls_without_visible_changes_keep_the_etags(db):
+    user = User(username="poller", email="poller@example.com", hashed_password="x")
+    source = FeedSource(url="http://example.com/polled.xml")
+    db.add_all([user, source])
+    db.flush()
+    db.add(Feed(user_id=user.id, source_id=source.id, title="Polled"))
+    db.commit()
+
+    store_articles(source, one_entry_feed("http://example.com/polled/1"), db)
+    first = user_versions(db, user.id)
+    for result in (FetchResult(status="not_modified", status_code=304), FetchResult(status="unchanged")):
+        db.refresh(source)
+        store_articles(source, result, db)
+        assert user_versions(db, user.id) == first
+
+    db.refresh(source)
+    store_articles(source, one_entry_feed("http://example.com/polled/2"), db)
+    feeds_version, articles_version, counts_version = user_versions(db, user.id)
+    assert (feeds_version, articles_version, counts_version) == (
+        first.feeds_version + 1, first.articles_version + 1, first.counts_version + 1
+    )
@@ -9,10 +9,11 @@ import ArticleReader from '@/components/ArticleReader';
 import type { Article } from '@/types';
 import { Newspaper, LogOut, Maximize2, Minimize2, BookMarked, FileText, Sun, Moon, Monitor, Menu, X, BookOpen } from 'lucide-react';
 import { useTheme } from '@/lib/useTheme';
+import { useEventStream } from '@/lib/useEventStream';
 
 export default function DashboardPage() {
   const router = useRouter();
-  const { isAuthenticated, logout, user, setHydrated } = useAuthStore();
+  const { isAuthenticated, logout, user, token, setHydrated } = useAuthStore();
   const [selectedFeedId, setSelectedFeedId] = useState<number | null>(null);
   const [selectedArticle, setSelectedArticle] = useState<Article | null>(null);
   const [mounted, setMounted] = useState(false);
@@ -23,6 +24,7 @@ export default function DashboardPage() {
   const [mobileFeedDrawerOpen, setMobileFeedDrawerOpen] = useState(false);
   const [mobileArticleDrawerOpen, setMobileArticleDrawerOpen] = useState(false);
   const { theme, setTheme } = useTheme();
+  useEventStream(token);
 
   const cycleTheme = () => {
     if (theme === 'light') {
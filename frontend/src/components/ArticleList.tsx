@@ -2,7 +2,7 @@
 
 import useSWR from 'swr';
 import { articlesApi } from '@/lib/api';
-import type { Article } from '@/types';
+import type { Article, ArticleListItem } from '@/types';
 import { format } from 'date-fns';
 import { FileText, Inbox, Star, Circle, CheckCircle2 } from 'lucide-react';
 
@@ -15,14 +15,22 @@ interface ArticleListProps {
 export default function ArticleList({ feedId, onSelectArticle, selectedArticleId }: ArticleListProps) {
   const { data: articles, error, mutate } = useSWR(
     ['articles', feedId],
-    () => articlesApi.getAll(feedId ? { feed_id: feedId } : {})
+    () => articlesApi.getAll(feedId ? { feed_id: feedId } : { collapse_duplicates: true })
   );
 
+  // Only the flags change; the rest of the cached list entry stays as it is
+  const patchFlags = (updated: ArticleListItem) =>
+    mutate(
+      (list) => list?.map((a) =>
+        a.id === updated.id ? { ...a, is_read: updated.is_read, is_starred: updated.is_starred } : a
+      ),
+      { revalidate: false }
+    );
+
   const handleMarkRead = async (article: Article, e: React.MouseEvent) => {
     e.stopPropagation();
     try {
-      await articlesApi.markRead(article.id, !article.is_read);
-      mutate();
+      patchFlags(await articlesApi.markRead(article.id, !article.is_read));
     } catch (err) {
       console.error('Failed to mark article:', err);
     }
@@ -31,8 +39,7 @@ export default function ArticleList({ feedId, onSelectArticle, selectedArticleId
   const handleMarkStarred = async (article: Article, e: React.MouseEvent) => {
     e.stopPropagation();
     try {
-      await articlesApi.markStarred(article.id, !article.is_starred);
-      mutate();
+      patchFlags(await articlesApi.markStarred(article.id, !article.is_starred));
     } catch (err) {
       console.error('Failed to star article:', err);
     }
@@ -142,6 +149,16 @@ export default function ArticleList({ feedId, onSelectArticle, selectedArticleId
                       </span>
                     </>
                   )}
+                  {!!article.reading_time && (
+                    <>
+                      {(article.author || article.published_at) && (
+                        <span style={{ color: 'var(--apple-text-tertiary)', fontSize: '13px' }}>•</span>
+                      )}
+                      <span style={{ color: 'var(--apple-text-tertiary)', fontSize: '13px' }}>
+                        {article.reading_time} min read
+                      </span>
+                    </>
+                  )}
                   <button
                     onClick={(e) => handleMarkRead(article, e)}
                     className="ml-auto px-2 py-0.5 rounded-full text-xs font-medium transition-all"
@@ -155,16 +172,29 @@ export default function ArticleList({ feedId, onSelectArticle, selectedArticleId
                 </div>
 
                 {/* Preview */}
-                {article.content && (
-                  <p
-                    className="line-clamp-2 leading-relaxed"
-                    style={{
-                      color: 'var(--apple-text-secondary)',
-                      fontSize: '14px'
-                    }}
-                  >
-                    {article.content.replace(/<[^>]*>/g, '').substring(0, 150)}...
-                  </p>
+                {(article.excerpt || article.lead_image) && (
+                  <div className="flex items-start gap-3">
+                    {article.excerpt && (
+                      <p
+                        className="flex-1 line-clamp-2 leading-relaxed"
+                        style={{
+                          color: 'var(--apple-text-secondary)',
+                          fontSize: '14px'
+                        }}
+                      >
+                        {article.excerpt}
+                      </p>
+                    )}
+                    {article.lead_image && (
+                      <img
+                        src={article.lead_image}
+                        alt=""
+                        loading="lazy"
+                        className="w-16 h-16 object-cover flex-shrink-0 ml-auto"
+                        style={{ borderRadius: '8px' }}
+                      />
+                    )}
+                  </div>
                 )}
               </div>
             </div>
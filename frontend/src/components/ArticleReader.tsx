@@ -1,6 +1,7 @@
 'use client';
 
 import { useEffect, useMemo, useState, useRef } from 'react';
+import useSWR from 'swr';
 import { articlesApi } from '@/lib/api';
 import type { Article } from '@/types';
 import { format } from 'date-fns';
@@ -18,6 +19,13 @@ export default function ArticleReader({ article, onClose }: ArticleReaderProps)
   const [currentImageIndex, setCurrentImageIndex] = useState(0);
   const [images, setImages] = useState<Array<{ src: string; alt?: string; caption?: string }>>([]);
 
+  // Lists only carry excerpts; the content comes from the article itself
+  const { data: detail } = useSWR(
+    article ? ['article', article.id] : null,
+    () => articlesApi.getById(article!.id)
+  );
+  const content = detail?.id === article?.id ? detail?.content : undefined;
+
   useEffect(() => {
     if (article && !article.is_read) {
       articlesApi.markRead(article.id, true).catch(console.error);
@@ -26,13 +34,13 @@ export default function ArticleReader({ article, onClose }: ArticleReaderProps)
 
   // Process content to handle callouts
   const processedContent = useMemo(() => {
-    if (!article?.content) return '';
+    if (!content) return '';
 
-    let content = article.content;
+    let html = content;
 
     // Handle [!type] callouts
     const calloutRegex = /\[!(\w+)\]\s*([^\n]+)((?:\n(?!<p>|\[!)[^\n]*)*)/gi;
-    content = content.replace(calloutRegex, (match, type, title, body) => {
+    html = html.replace(calloutRegex, (match, type, title, body) => {
       const typeMap: Record<string, string> = {
         'note': 'note',
         'info': 'info',
@@ -53,8 +61,8 @@ export default function ArticleReader({ article, onClose }: ArticleReaderProps)
       </div>`;
     });
 
-    return content;
-  }, [article?.content]);
+    return html;
+  }, [content]);
 
   // Extract images and add click handlers
   useEffect(() => {
@@ -178,6 +186,10 @@ export default function ArticleReader({ article, onClose }: ArticleReaderProps)
               className="article-content"
               dangerouslySetInnerHTML={{ __html: processedContent }}
             />
+          ) : detail?.id !== article.id ? (
+            <div className="py-12 text-center" style={{ color: 'var(--apple-text-tertiary)', fontSize: '15px' }}>
+              Loading article...
+            </div>
           ) : (
             <div className="text-center py-12" style={{ color: 'var(--apple-text-tertiary)' }}>
               <FileText size={48} className="mx-auto mb-3" style={{ color: 'var(--apple-text-tertiary)' }} />
@@ -1,10 +1,10 @@
 'use client';
 
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import useSWR from 'swr';
 import { feedsApi } from '@/lib/api';
 import type { Feed } from '@/types';
-import { BookMarked, Plus, X, RefreshCw, Trash2, Inbox, Rss } from 'lucide-react';
+import { BookMarked, Plus, X, RefreshCw, Trash2, Inbox, Rss, Upload, Download } from 'lucide-react';
 
 interface FeedListProps {
   onSelectFeed: (feedId: number | null) => void;
@@ -16,6 +16,8 @@ export default function FeedList({ onSelectFeed, selectedFeedId }: FeedListProps
   const [showAddForm, setShowAddForm] = useState(false);
   const [newFeed, setNewFeed] = useState({ title: '', url: '', category: '' });
   const [loading, setLoading] = useState(false);
+  const [importMessage, setImportMessage] = useState<string | null>(null);
+  const importInput = useRef<HTMLInputElement>(null);
 
   const handleAddFeed = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -45,6 +47,37 @@ export default function FeedList({ onSelectFeed, selectedFeedId }: FeedListProps
     }
   };
 
+  const handleImport = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    e.target.value = '';
+    if (!file) return;
+    try {
+      const result = await feedsApi.importOpml(file);
+      setImportMessage(
+        `Imported ${result.created} feeds` +
+        (result.already_subscribed ? `, ${result.already_subscribed} already subscribed` : '')
+      );
+      mutate();
+    } catch (err) {
+      console.error('Failed to import feeds:', err);
+      setImportMessage('Import failed: not a valid OPML file?');
+    }
+  };
+
+  const handleExport = async () => {
+    try {
+      const blob = await feedsApi.exportOpml();
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'subscriptions.opml';
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      console.error('Failed to export feeds:', err);
+    }
+  };
+
   const handleRefreshFeed = async (id: number, e: React.MouseEvent) => {
     e.stopPropagation();
     try {
@@ -94,6 +127,38 @@ export default function FeedList({ onSelectFeed, selectedFeedId }: FeedListProps
             </>
           )}
         </button>
+        <div className="flex gap-2 mt-2">
+          <button
+            onClick={() => importInput.current?.click()}
+            className="apple-button-secondary flex-1 flex items-center justify-center gap-2"
+            style={{ fontSize: '13px', padding: '8px' }}
+          >
+            <Upload size={14} />
+            <span>Import OPML</span>
+          </button>
+          <button
+            onClick={handleExport}
+            className="apple-button-secondary flex-1 flex items-center justify-center gap-2"
+            style={{ fontSize: '13px', padding: '8px' }}
+          >
+            <Download size={14} />
+            <span>Export</span>
+          </button>
+          <input
+            ref={importInput}
+            type="file"
+            accept=".opml,.xml,text/x-opml,text/xml"
+            onChange={handleImport}
+            className="hidden"
+          />
+        </div>
+        {importMessage && (
+          <div className="mt-2" style={{ fontSize: '13px', color: 'var(--apple-text-secondary)' }}>
+            {importMessage}
+            {feeds.some((feed: Feed) => feed.fetch_status === 'pending') &&
+              ` · fetching ${feeds.filter((feed: Feed) => feed.fetch_status === 'pending').length} feeds...`}
+          </div>
+        )}
       </div>
 
       {/* Add Feed Form */}
@@ -187,6 +252,17 @@ export default function FeedList({ onSelectFeed, selectedFeedId }: FeedListProps
                     {feed.category}
                   </div>
                 )}
+                {feed.fetch_status === 'pending' && (
+                  <div className="text-xs mt-1" style={{ color: 'var(--apple-text-tertiary)' }}>
+                    Fetching...
+                  </div>
+                )}
+                {feed.fetch_status === 'error' && (
+                  <div className="text-xs mt-1 truncate" style={{ color: '#FF3B30' }}
+                       title={`${feed.last_error} (failed ${feed.consecutive_failures} times in a row)`}>
+                    {feed.consecutive_failures > 1 && `${feed.consecutive_failures}× `}{feed.last_error}
+                  </div>
+                )}
               </div>
               <div className="flex gap-1 opacity-0 group-hover:opacity-100 transition-opacity">
                 <button
@@ -1,7 +1,7 @@
 import axios from 'axios';
-import type { AuthResponse, LoginCredentials, RegisterData, Feed, Article } from '@/types';
+import type { AuthResponse, LoginCredentials, RegisterData, Feed, FeedCounts, FeedImportResult, Article, ArticleListItem } from '@/types';
 
-const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+export const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_URL,
@@ -28,6 +28,14 @@ export const authApi = {
     const response = await api.post<AuthResponse>('/api/auth/login', formData);
     return response.data;
   },
+
+  changePassword: async (currentPassword: string, newPassword: string) => {
+    const response = await api.put<AuthResponse>('/api/auth/password', {
+      current_password: currentPassword,
+      new_password: newPassword,
+    });
+    return response.data;
+  },
 };
 
 export const feedsApi = {
@@ -41,6 +49,11 @@ export const feedsApi = {
     return response.data;
   },
 
+  getCounts: async () => {
+    const response = await api.get<FeedCounts>('/api/feeds/counts');
+    return response.data;
+  },
+
   create: async (data: Partial<Feed>) => {
     const response = await api.post<Feed>('/api/feeds/', data);
     return response.data;
@@ -59,6 +72,18 @@ export const feedsApi = {
     const response = await api.post(`/api/feeds/${id}/refresh`);
     return response.data;
   },
+
+  importOpml: async (file: File) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post<FeedImportResult>('/api/feeds/import', formData);
+    return response.data;
+  },
+
+  exportOpml: async () => {
+    const response = await api.get<Blob>('/api/feeds/export', { responseType: 'blob' });
+    return response.data;
+  },
 };
 
 export const articlesApi = {
@@ -67,10 +92,12 @@ export const articlesApi = {
     is_read?: boolean;
     is_starred?: boolean;
     search?: string;
+    collapse_duplicates?: boolean;
+    cursor?: string;
     skip?: number;
     limit?: number;
   }) => {
-    const response = await api.get<Article[]>('/api/articles/', { params });
+    const response = await api.get<ArticleListItem[]>('/api/articles/', { params });
     return response.data;
   },
 
@@ -80,12 +107,24 @@ export const articlesApi = {
   },
 
   markRead: async (id: number, is_read: boolean) => {
-    const response = await api.post<Article>(`/api/articles/${id}/read`, { is_read });
+    const response = await api.post<ArticleListItem>(`/api/articles/${id}/read`, { is_read });
     return response.data;
   },
 
   markStarred: async (id: number, is_starred: boolean) => {
-    const response = await api.post<Article>(`/api/articles/${id}/star`, { is_starred });
+    const response = await api.post<ArticleListItem>(`/api/articles/${id}/star`, { is_starred });
+    return response.data;
+  },
+
+  markMany: async (data: {
+    article_ids?: number[];
+    feed_id?: number;
+    category?: string;
+    older_than?: string;
+    is_read?: boolean;
+    is_starred?: boolean;
+  }) => {
+    const response = await api.post<{ updated: number }>('/api/articles/mark', data);
     return response.data;
   },
 };
@@ -0,0 +1,30 @@
+import { useEffect } from 'react';
+import { useSWRConfig } from 'swr';
+import { API_URL } from './api';
+
+// Revalidates feeds and article lists when the server reports changes, instead of polling.
+// EventSource reconnects by itself and resumes from the last event it received.
+export function useEventStream(token: string | null) {
+  const { mutate } = useSWRConfig();
+
+  useEffect(() => {
+    if (!token || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(
+      `${API_URL}/api/events/stream?access_token=${encodeURIComponent(token)}`
+    );
+    const reloadFeeds = () => mutate('feeds');
+    const reloadArticles = () =>
+      mutate((key) => Array.isArray(key) && key[0] === 'articles');
+    const reloadAll = () => {
+      reloadFeeds();
+      reloadArticles();
+    };
+
+    source.addEventListener('articles', reloadAll);
+    source.addEventListener('feeds', reloadFeeds);
+    source.addEventListener('counts', reloadFeeds);
+    source.addEventListener('reset', reloadAll);
+    return () => source.close();
+  }, [token, mutate]);
+}
@@ -8,27 +8,58 @@ export interface User {
 export interface Feed {
   id: number;
   user_id: number;
+  source_id: number;
   title: string;
   url: string;
   description?: string;
   category?: string;
+  unread_count: number;
+  starred_count: number;
   last_fetched?: string;
+  last_error?: string;
+  fetch_status: 'pending' | 'ok' | 'error';
+  last_error_at?: string;
+  consecutive_failures: number;
+  last_status_code?: number;
+  next_fetch_at?: string;
   created_at: string;
 }
 
+export interface FeedImportResult {
+  created: number;
+  already_subscribed: number;
+  invalid: number;
+  feed_ids: number[];
+}
+
+export interface FeedCounts {
+  feeds: Array<{ feed_id: number; unread: number; starred: number }>;
+  categories: Array<{ category?: string; unread: number; starred: number }>;
+  unread: number;
+  starred: number;
+}
+
 export interface Article {
   id: number;
   feed_id: number;
   title: string;
   link: string;
+  // Only returned by GET /api/articles/{id}; lists carry the excerpt instead
   content?: string;
+  excerpt?: string;
+  reading_time?: number;
+  lead_image?: string;
   author?: string;
   published_at?: string;
   fetched_at: string;
+  duplicate_of_id?: number;
   is_read: boolean;
   is_starred: boolean;
 }
 
+// What lists and the read/star endpoints return: everything but the content
+export type ArticleListItem = Omit<Article, 'content'>;
+
 export interface LoginCredentials {
   username: string;
   password: string;